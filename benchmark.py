@@ -0,0 +1,299 @@
+# PyDocumentor is a command-line script to create HTML documentation for Python
+# Copyright (C) 2017 Jacob Morris
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+benchmark.py generates a synthetic package and times each phase of documenting it with PyDocumentor: finding the
+files, importing them, collecting their data (by inspecting the imports, and by parsing the source), formatting with
+each Formatter, writing the output, and writing it again when nothing changed, plus rendering a single module of
+LONG_MODULE_FUNCTIONS functions. The memory the collected data takes up is measured as well. Results are saved as JSON
+along with the commit they were taken at, so runs can be compared across commits with --compare.
+
+    python benchmark.py --modules 200 --classes 5 --methods 10 --depth 3 --repeat 5
+"""
+
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+import json
+from os import mkdir, sep
+from os.path import dirname, abspath, join as path_join
+import platform
+import subprocess
+from tempfile import TemporaryDirectory, mkdtemp
+from time import perf_counter
+import tracemalloc
+
+from py_documentor import HtmlFormatter, MarkdownFormatter, PyDocumentor, UserOptions, __version__
+
+FORMATTERS = (HtmlFormatter, MarkdownFormatter)
+LONG_MODULE_FUNCTIONS = 5000  # functions in the single module that rendering one long block of functions is timed on
+WORDS = ("collect", "format", "module", "value", "return", "class", "index", "render", "option", "symbol", "parse",
+         "export", "the", "of", "and", "a", "to", "with")
+
+
+def generate_package(folder: str, modules=50, classes=5, methods=10, depth=2, doc_words=30, constant_size=10) -> int:
+    """
+    Write a synthetic package of modules into folder. Each class inherits from the one before it in a chain of depth
+    classes, so deeper chains give every class more inherited members to look through.
+    :param folder: the folder to write the modules into
+    :param modules: the number of modules
+    :param classes: the number of classes in each module
+    :param methods: the number of methods in each class
+    :param depth: the length of each chain of inheritance
+    :param doc_words: the number of words in each docstring
+    :param constant_size: the number of items in each constant
+    :return: the number of bytes of source written
+    """
+    def doc(seed: int, indent: str, params=()) -> str:
+        words = " ".join(WORDS[(seed + i * 7) % len(WORDS)] for i in range(doc_words))
+        lines = ['{}"""'.format(indent), "{}{}".format(indent, words)]
+        lines.extend("{}:param {}: the {} to use".format(indent, param, param) for param in params)
+        if params:
+            lines.append("{}:return: the {} that was found".format(indent, WORDS[seed % len(WORDS)]))
+        lines.append('{}"""'.format(indent))
+        return "\n".join(lines)
+
+    size = 0
+    for m in range(modules):
+        lines = [doc(m, ""), ""]
+        for f in range(methods):
+            lines.append("def function_{}(value: int, name='function', *args, **kwargs) -> str:".format(f))
+            lines.append(doc(m + f, "    ", ("value", "name")))
+            lines.append("    return name\n")
+
+        for c in range(classes):
+            base = "Class{}".format(c - 1) if c % max(depth, 1) else "object"
+            lines.append("class Class{}({}):".format(c, base))
+            lines.append(doc(m + c, "    "))
+            lines.append("    CONSTANT_{} = {!r}".format(c, list(range(constant_size))))
+            lines.append("    NAME_{} = {!r}".format(c, "class" * constant_size))
+            for f in range(methods):
+                lines.append("    def method_{}_{}(self, value: int, scale=1.5, flag=True) -> int:".format(c, f))
+                lines.append(doc(m + c + f, "        ", ("value", "scale", "flag")))
+                lines.append("        return value\n")
+            lines.append("    @staticmethod")
+            lines.append("    def static_{}(value, *others):".format(c))
+            lines.append(doc(m + c, "        ", ("value",)))
+            lines.append("        return value\n")
+
+        source = "\n".join(lines) + "\n"
+        with open(path_join(folder, "synthetic_{}.py".format(m)), 'w') as file:
+            file.write(source)
+        size += len(source)
+
+    return size
+
+
+def time_phase(func, repeat: int) -> tuple:
+    """
+    Run func repeat times
+    :param func: the phase to time, it is called with no arguments
+    :param repeat: how many times to run it
+    :return: ({'best': seconds, 'mean': seconds}, what func returned the last time)
+    """
+    times, result = [], None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func()
+        times.append(perf_counter() - start)
+
+    return {'best': min(times), 'mean': sum(times) / len(times)}, result
+
+
+def measure_memory(func) -> tuple:
+    """
+    Run func once while tracing allocations
+    :param func: the phase to measure, it is called with no arguments
+    :return: (bytes still allocated by func once it returns, what func returned)
+    """
+    tracemalloc.start()
+    try:
+        result = func()
+        allocated, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return allocated, result
+
+
+def fresh_documentor(static: bool) -> PyDocumentor:
+    """
+    Create a PyDocumentor with every cache it keeps empty, so each run of a phase does all of its work
+    :param static: whether or not to collect from the source instead of importing
+    :return: the PyDocumentor
+    """
+    PyDocumentor._parse_docstring.cache_clear()
+    options = UserOptions()
+    options.static_collection = static
+    options.link_symbols = False
+    options.search_index = False
+    return PyDocumentor(options=options)
+
+
+def run(parameters: dict, repeat: int) -> dict:
+    """
+    Generate a package with parameters and time every phase on it
+    :param parameters: the keyword arguments for generate_package()
+    :param repeat: how many times to run each phase
+    :return: the phases, memory and counts, ready to be saved as JSON
+    """
+    phases, memory, counts = {}, {}, {}
+    with TemporaryDirectory() as folder:
+        counts['source_bytes'] = generate_package(folder, **parameters)
+        folder += sep
+
+        finder = fresh_documentor(False)
+        phases['discovery'], file_paths = time_phase(lambda: finder._find_python_files(folder), repeat)
+
+        def import_modules():
+            documentor = fresh_documentor(False)
+            documentor._file_paths = file_paths
+            return documentor, documentor._import_modules()
+        phases['import'], (documentor, modules) = time_phase(import_modules, repeat)
+
+        def introspect():
+            PyDocumentor._parse_docstring.cache_clear()
+            return [documentor._collect_module_info(mod) for mod in modules]
+        phases['introspection'], collected = time_phase(introspect, repeat)
+        memory['introspection'], _ = measure_memory(introspect)
+
+        def parse_modules():
+            static = fresh_documentor(True)
+            static._file_paths = file_paths
+            return static, static._parse_modules()
+        phases['static_parse'], (static, parsed) = time_phase(parse_modules, repeat)
+
+        def introspect_static():
+            PyDocumentor._parse_docstring.cache_clear()
+            return [static._collect_module_info_ast(name, source, tree) for _, name, source, tree in parsed]
+        phases['static_introspection'], _ = time_phase(introspect_static, repeat)
+        memory['static_introspection'], _ = measure_memory(introspect_static)
+
+        data = dict(zip(file_paths, collected))
+        counts['modules'] = len(data)
+        counts['classes'] = sum(len(mod['classes']) for mod in data.values())
+        counts['functions'] = sum(len(list(PyDocumentor._module_functions(mod))) for mod in data.values())
+
+        output_folder = path_join(folder, "output")
+        mkdir(output_folder)
+        for ft_class in FORMATTERS:
+            ft = ft_class(documentor.options)
+            name = ft_class.__name__
+
+            def render():
+                return {file_path: documentor._format_module(ft, mod) for file_path, mod in data.items()}
+            phases['render_' + name], formatted = time_phase(render, repeat)
+            counts['output_bytes_' + name] = sum(len(text) for text in formatted.values())
+
+            # a new folder each time, since files that are already up to date aren't written again
+            phases['write_' + name], _ = time_phase(
+                lambda: PyDocumentor._file_writer(mkdtemp(dir=output_folder), formatted, ft.FILE_EXT), repeat)
+            phases['rewrite_unchanged_' + name], _ = time_phase(
+                lambda: PyDocumentor._file_writer(output_folder, formatted, ft.FILE_EXT), repeat)
+
+    # one module with a single huge block of functions, where how the pieces get into the output matters the most
+    with TemporaryDirectory() as folder:
+        generate_package(folder, modules=1, classes=0, methods=LONG_MODULE_FUNCTIONS,
+                         doc_words=parameters.get('doc_words', 30))
+        static = fresh_documentor(True)
+        static._file_paths = static._find_python_files(folder + sep)
+        (_, name, source, tree), = static._parse_modules()
+        long_module = static._collect_module_info_ast(name, source, tree)
+        counts['long_module_functions'] = len(long_module['functions'])
+
+        for ft_class in FORMATTERS:
+            ft = ft_class(static.options)
+            phases['render_long_module_' + ft_class.__name__], _ = time_phase(
+                lambda: static._format_module(ft, long_module), repeat)
+
+    return {'phases': phases, 'memory': memory, 'counts': counts}
+
+
+def commit_info() -> dict:
+    """
+    Find the commit the benchmark is being run at
+    :return: the commit hash and whether or not there are uncommitted changes, both None outside of a git checkout
+    """
+    def git(*args):
+        return subprocess.run(("git",) + args, cwd=dirname(abspath(__file__)), capture_output=True, text=True,
+                              check=True).stdout.strip()
+
+    try:
+        return {'commit': git("rev-parse", "HEAD"), 'dirty': bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def compare(results: dict, baseline_path: str):
+    """
+    Print how long each phase took compared to an earlier run
+    :param results: the results of this run
+    :param baseline_path: the path of the results of the earlier run
+    """
+    with open(baseline_path, 'r') as file:
+        baseline = json.load(file)
+
+    if baseline['parameters'] != results['parameters']:
+        print("<warning: {} was run with different parameters>".format(baseline_path))
+
+    print("\n{:<30}{:>12}{:>12}{:>10}".format("phase", "before (s)", "after (s)", "change"))
+    for phase, timing in results['phases'].items():
+        if phase in baseline['phases']:
+            before, after = baseline['phases'][phase]['best'], timing['best']
+            print("{:<30}{:>12.4f}{:>12.4f}{:>+9.1f}%".format(phase, before, after, (after / before - 1) * 100))
+
+    print("\n{:<30}{:>12}{:>12}{:>10}".format("collected data", "before (KB)", "after (KB)", "change"))
+    for phase, allocated in results['memory'].items():
+        if phase in baseline.get('memory', {}):
+            before = baseline['memory'][phase]
+            print("{:<30}{:>12.1f}{:>12.1f}{:>+9.1f}%".format(phase, before / 1024, allocated / 1024,
+                                                             (allocated / before - 1) * 100))
+
+
+def main():
+    parser = ArgumentParser(description="Time each phase of PyDocumentor on a synthetic package")
+    parser.add_argument("--modules", type=int, default=50, help="modules in the package")
+    parser.add_argument("--classes", type=int, default=5, help="classes in each module")
+    parser.add_argument("--methods", type=int, default=10, help="methods in each class, and functions in each module")
+    parser.add_argument("--depth", type=int, default=2, help="length of each chain of inheritance")
+    parser.add_argument("--doc-words", type=int, default=30, help="words in each docstring")
+    parser.add_argument("--constant-size", type=int, default=10, help="items in each constant")
+    parser.add_argument("--repeat", type=int, default=3, help="times to run each phase, the best time is kept")
+    parser.add_argument("--output", help="file to save the results to, defaults to benchmark-<commit>.json")
+    parser.add_argument("--compare", help="results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    parameters = {'modules': args.modules, 'classes': args.classes, 'methods': args.methods, 'depth': args.depth,
+                  'doc_words': args.doc_words, 'constant_size': args.constant_size}
+    results = dict(commit_info(), version=__version__, python=platform.python_version(), platform=platform.platform(),
+                   timestamp=datetime.now(timezone.utc).isoformat(), parameters=parameters, repeat=args.repeat)
+    results.update(run(parameters, args.repeat))
+
+    for phase, timing in results['phases'].items():
+        print("{:<30}{:>10.4f}s best{:>10.4f}s mean".format(phase, timing['best'], timing['mean']))
+    for phase, allocated in results['memory'].items():
+        print("{:<30}{:>10.1f}KB collected".format(phase, allocated / 1024))
+
+    output = args.output or "benchmark-{}.json".format((results['commit'] or "unknown")[:12])
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print("\nResults saved to <{}>".format(output))
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
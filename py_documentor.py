@@ -15,10 +15,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 """
-py_documentor.py contains five different classes. The primary one is PyDocumentor, which uses the others.
+py_documentor.py contains several classes. The primary one is PyDocumentor, which uses the others.
 PyDocumentor gives access to a console-based program that takes Python files and creates documentation for them using
 class and function definitions and any available docstrings. To use, just run this module, or, create an instance of 
-PyDocumentor and then call its export() method.
+PyDocumentor and then call its export() method. Run it with --help to see how to build without being asked anything,
+including many targets at once from a config file.
 
 Extra information can be provided in the docstrings to help build better documentation. 
 :param name:, :return: both work only with functions and allow more information to be added about those items
@@ -30,12 +31,188 @@ given, then all methods are excluded
 This will also override and collect a private method even if that option is False.
 """
 
-from os import walk, mkdir, sep
-from os.path import isfile, isdir, split as path_split, exists as path_exists, join as path_join
+from os import walk, mkdir, sep, cpu_count, remove, replace, getpid, fsencode, scandir, listdir, stat as path_stat, \
+    read as fd_read, close as fd_close
+from os.path import isfile, isdir, relpath, split as path_split, exists as path_exists, join as path_join
+from argparse import ArgumentParser
+import ast
+import builtins
+import ctypes
+import ctypes.util
+from collections import OrderedDict, namedtuple
+from collections.abc import MutableMapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import cProfile
+import dis
+from fnmatch import fnmatchcase
+from functools import lru_cache
+import hashlib
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 import importlib.util
+from io import StringIO
+import json
+import marshal
+import multiprocessing
+from multiprocessing.connection import wait as wait_for_connections
+import pstats
+from queue import Queue
+from select import select
+import struct
+import sys
+from threading import Lock, Thread, get_ident, local
+from time import perf_counter, process_time, sleep, thread_time
+import tracemalloc
+from types import MappingProxyType
 from inspect import getmembers, signature, isclass, isfunction, ismethod, Parameter, getfullargspec
 import re
 from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+try:
+    import resource
+except ImportError:  # only available on Unix
+    resource = None
+
+__version__ = "1.1.0"
+
+
+class BoundedRepr:
+    """
+    Formats constants and default values the way str() would, within limits on length, nesting and items, so a value
+    holding a huge list or array costs no more to format than a small one. Builtin containers, and subclasses that
+    keep their repr, are formatted item by item and stop as soon as the text is too long, so only the items that are
+    shown are ever looked at. Array-likes with more than max_items elements are summarized by their shape and dtype.
+    Anything within the limits comes out exactly as str() would give it.
+    """
+    ELLIPSIS = "..."
+
+    class _Full(Exception):
+        pass
+
+    def __init__(self, max_length=500, max_depth=5, max_items=50):
+        """
+        :param max_length: the most characters to format a value as, longer text is cut off and ends in ELLIPSIS
+        :param max_depth: how deep containers can be nested before being shown as [...]
+        :param max_items: the most items to show of each container
+        """
+        self.max_length = max_length
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_int_bits = max_length * 4  # ~1.2 digits per 4 bits, anything bigger can't be shown anyway
+
+    def _cut(self, text: str) -> str:
+        if len(text) <= self.max_length:
+            return text
+        return text[:self.max_length - len(self.ELLIPSIS)] + self.ELLIPSIS
+
+    def _summarize(self, value) -> Optional[str]:
+        """
+        Summarize an array-like, anything that isn't builtin with a tuple shape and a dtype, with too many elements
+        :param value: the value
+        :return: the summary, or None if value isn't a big array-like
+        """
+        if type(value).__module__ == 'builtins':
+            return None
+        shape = getattr(value, 'shape', None)
+        if not isinstance(shape, tuple) or not hasattr(value, 'dtype'):
+            return None
+
+        size = 1
+        for dimension in shape:
+            size *= dimension
+        if size <= self.max_items:
+            return None
+        return "<{} shape={} dtype={}>".format(type(value).__name__, tuple(shape), value.dtype)
+
+    def _write(self, value, depth: int, write, active: set):
+        """
+        Write the repr of value, one piece at a time
+        :param value: the value
+        :param depth: how many containers value is inside of
+        :param write: called with each piece, raises _Full once there is enough
+        :param active: the ids of the containers being written, to catch ones that contain themselves
+        """
+        kind = type(value)
+        repr_method = kind.__repr__
+        if repr_method is list.__repr__:
+            start, end, empty = "[", "]", "[]"
+        elif repr_method is tuple.__repr__:
+            start, end, empty = "(", ")", "()"
+        elif repr_method is dict.__repr__:
+            start, end, empty = "{", "}", "{}"
+        elif repr_method is set.__repr__ or repr_method is frozenset.__repr__:
+            if kind is set:
+                start, end, empty = "{", "}", "set()"
+            else:
+                start, end, empty = kind.__name__ + "({", "})", kind.__name__ + "()"
+        elif kind is str or kind is bytes:
+            write(repr(value[:self.max_length]))  # cut off anyway if it's any longer
+            return
+        elif kind is int and value.bit_length() > self.max_int_bits:
+            write("<int of {} bits>".format(value.bit_length()))
+            return
+        else:
+            write(self._summarize(value) or repr(value))
+            return
+
+        if not value:
+            write(empty)
+            return
+        if depth >= self.max_depth or id(value) in active:
+            write(start + self.ELLIPSIS + end)
+            return
+
+        active.add(id(value))
+        write(start)
+        is_dict = repr_method is dict.__repr__
+        for i, item in enumerate(value.items() if is_dict else value):
+            if i:
+                write(", ")
+            if i == self.max_items:
+                write(self.ELLIPSIS)
+                break
+            if is_dict:
+                self._write(item[0], depth + 1, write, active)
+                write(": ")
+                item = item[1]
+            self._write(item, depth + 1, write, active)
+        if len(value) == 1 and repr_method is tuple.__repr__:
+            write(",")
+        write(end)
+        active.discard(id(value))
+
+    def format(self, value) -> str:
+        """
+        Format value for the docs
+        :param value: the constant or default value
+        :return: str(value), or a shortened form of it no longer than max_length
+        """
+        kind = type(value)
+        if kind is str:
+            return self._cut(value)
+
+        summary = self._summarize(value)
+        if summary is not None:
+            return self._cut(summary)
+        if kind.__str__ is not object.__str__:  # str() isn't just the repr
+            return self._cut(str(value))
+
+        parts, length = [], 0
+
+        def write(text):
+            nonlocal length
+            parts.append(text)
+            length += len(text)
+            if length > self.max_length:
+                raise self._Full
+
+        try:
+            self._write(value, 0, write, set())
+        except self._Full:
+            pass
+        return self._cut("".join(parts))
 
 
 class Formatter:
@@ -44,6 +221,21 @@ class Formatter:
     PyDocumentor.export(), even if the individual format classes don't implement that specific method.
     """
     FILE_EXT = ""  # file extension for the format
+    COMPILE_PLANS = True  # let RenderPlan compile the hooks, set False if a classmethod hook depends on changing state
+    WRITE_DIRECTLY = False  # write each piece straight into the stream, rather than gathering them until a flush
+    VALUE_REPR = BoundedRepr()  # formats constants and default values, within limits on how big they get
+
+    # every method that returns a piece of the formatted output, in the order they are first called for a module
+    HOOKS = ('top_of_file', 'module_title', 'module_start', 'module_doc', 'table_of_contents_start',
+             'table_of_contents_title', 'table_of_contents_body_start', 'table_of_contents_function',
+             'table_of_contents_class', 'table_of_contents_class_start', 'table_of_contents_constant',
+             'table_of_contents_class_end', 'table_of_contents_body_end', 'table_of_contents_end',
+             'module_functions_title', 'function_block_start', 'function_start', 'function_signature',
+             'function_body_start', 'function_doc', 'function_parameters', 'function_return_parameter',
+             'function_body_end', 'function_end', 'function_block_end', 'class_start', 'class_title',
+             'class_bases', 'class_body_start', 'class_doc', 'class_constants_title', 'class_constants_start',
+             'class_constant', 'class_constants_end', 'static_function_title', 'methods_title', 'class_body_end',
+             'class_end', 'module_end')
 
     def __init__(self, options):
         """
@@ -52,12 +244,30 @@ class Formatter:
         """
         self.options = options
 
+    def create_sink(self, stream):
+        """
+        Create the sink that PyDocumentor calls the hooks through to write a module into stream. With WRITE_DIRECTLY,
+        a StreamSink writes every piece into stream as it comes, otherwise the FormatterSink gathers them until each
+        flush. Override this to return a sink whose hooks write into stream themselves.
+        :param stream: the text stream to write to, anything with a write(str) method
+        :return: a FormatterSink for this formatter
+        """
+        return (StreamSink if self.WRITE_DIRECTLY else FormatterSink)(self, stream)
+
     def free_run(self):
         """
         Run at the beginning of the module, before anything is formatted.
         """
         pass
 
+    def prepare(self, dir_path: str):
+        """
+        Run once per export, before any module is formatted. Anything shared by every module, like a stylesheet, can be
+        written into the export directory here instead of once per module.
+        :param dir_path: the export directory
+        """
+        pass
+
     def top_of_file(self) -> str:
         """
         Returns a string for the very top of the module file. This call happens right after free_run() is called
@@ -86,7 +296,8 @@ class Formatter:
             temp = i['name']
 
             if 'default' in i:
-                temp += '={}'.format(i['default'] if i['default'] != "" else '""')
+                default = i['default']
+                temp += '={}'.format('""' if type(default) is str and not default else cls.VALUE_REPR.format(default))
             elif 'annotation' in i:
                 temp += ": {}".format(i['annotation'])
 
@@ -103,6 +314,17 @@ class Formatter:
 
         return title + ", ".join(params) + ")" + anno
 
+    @classmethod
+    def link(cls, text: str, target: str, code=False) -> str:
+        """
+        Turn text into a link to something else that was documented. Without links, the text is left as it was.
+        :param text: the text to show
+        :param target: the output file and anchor to link to, as file#anchor
+        :param code: whether or not text is a name quoted in backticks in a docstring
+        :return: the link
+        """
+        return "`{}`".format(text) if code else text
+
     # ---------------------------------------------------------------------------------
     # MODULES
     # ---------------------------------------------------------------------------------
@@ -380,6 +602,16 @@ class Formatter:
         """
         return ""
 
+    @classmethod
+    def class_bases(cls, bases: list, indent=0):
+        """
+        Formats the base classes of a class, only called if the class has any besides object
+        :param bases: the names of the base classes, which may already be links
+        :param indent: how much to indent
+        :return: formatted base classes
+        """
+        return ""
+
     @classmethod
     def class_body_start(cls, indent=0):
         """
@@ -486,31 +718,54 @@ class HtmlFormatter(Formatter):
     :exclude_methods:
     """
     FILE_EXT = ".html"
+    WRITE_DIRECTLY = True
+    STYLESHEET = path_join(path_split(__file__)[0], "style.css")
 
     def __init__(self, options):
         super(HtmlFormatter, self).__init__(options)
-        self.css = ""
+        # the stylesheet is only read once per build, and the head every module starts with is only built once
+        self.css, self.css_name = self.load_stylesheet(self.STYLESHEET, options.minify_css)
+        if options.add_css_to_each_file:
+            self._head = "<head><style>{}</style></head>".format(self.css)
+        else:
+            self._head = "<head><link rel='stylesheet' type='text/css' href='{}'></head>".format(self.css_name)
+        if options.search_index:
+            self._head += "\n<div class='search_link'><a href='search.html'>Search</a></div>"
 
-    def free_run(self):
-        # generate in-line css
-        css_file_path = path_split(__file__)[0] + sep + "style.css"
-        css_file = open(css_file_path, 'r')
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def load_stylesheet(css_path: str, minify=False) -> tuple:
+        """
+        Read, and possibly minify, a stylesheet. The name it is exported under contains a hash of its contents, so a
+        browser can cache it for as long as it likes, a changed stylesheet just gets a new name.
+        :param css_path: the path of the stylesheet
+        :param minify: whether or not to remove comments and extra whitespace
+        :return: (css, hashed file name)
+        """
+        with open(css_path, 'r', encoding='utf-8') as file:
+            css = file.read()
 
-        self.css = "".join([line for line in css_file.readlines()])
-        css_file.close()
+        if minify:
+            css = re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+            css = re.sub(r"\s+", " ", css)
+            css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+            css = re.sub(r":\s+", ":", css).replace(";}", "}").strip()
 
-        # write css to file
+        name, ext = path_split(css_path)[1].rsplit(".", 1)
+        digest = hashlib.sha1(css.encode('utf-8')).hexdigest()[:12]
+        return css, "{}.{}.{}".format(name, digest, ext)
+
+    def prepare(self, dir_path: str):
+        # the hashed name only changes with the contents, so an existing file is left alone unless a failed write cut it
         if not self.options.add_css_to_each_file:
-            new_fp = self.options.output_directory + sep + "style.css"
-            new_css_file = open(new_fp, "w")
-            new_css_file.write(self.css)
-            new_css_file.close()
+            OutputWriter.replace_if_changed(path_join(dir_path, self.css_name), self.css)
 
     def top_of_file(self):
-        if self.options.add_css_to_each_file:
-            return "<head><style>{}</style></head>".format(self.css)
-        else:
-            return "<head><link rel='stylesheet' type='text/css' href='style.css'></head>"
+        return self._head
+
+    @classmethod
+    def link(cls, text: str, target: str, code=False):
+        return "<a href='{}'>{}</a>".format(target, "<code>{}</code>".format(text) if code else text)
 
     # ---------------------------------------------------------------------------------
     # MODULES
@@ -594,7 +849,7 @@ class HtmlFormatter(Formatter):
 
     @classmethod
     def function_signature(cls, func_name: str, parameters: list, return_anno, prefix="", indent=0):
-        return "<a id='{}.{}' class='function_title'>{}</a>".format(
+        return "<span id='{}.{}' class='function_title'>{}</span>".format(
             prefix, func_name, cls.general_function_signature(func_name, parameters, return_anno=return_anno))
 
     @classmethod
@@ -644,6 +899,10 @@ class HtmlFormatter(Formatter):
     def class_title(cls, title, prefix="", indent=0):
         return "<h3 id='{}.{}' >class {}</h3>".format(prefix, title, title)
 
+    @classmethod
+    def class_bases(cls, bases: list, indent=0):
+        return "<p class='bases'>Bases: {}</p>".format(", ".join(bases))
+
     @classmethod
     def class_body_start(cls, indent=0):
         return "<div class='class_body'>"
@@ -663,9 +922,10 @@ class HtmlFormatter(Formatter):
 
     @classmethod
     def class_constant(cls, name, value, prefix="", indent=0):
+        text = cls.VALUE_REPR.format(value)
         if isinstance(value, str):
-            value = "\"{}\"".format(value)
-        return "<a id='{}.{}' class='constant'>{} = {}</a><br>".format(prefix, name, name, value)
+            text = "\"{}\"".format(text)
+        return "<a id='{}.{}' class='constant'>{} = {}</a><br>".format(prefix, name, name, text)
 
     @classmethod
     def class_constants_end(cls, indent=0):
@@ -697,6 +957,7 @@ class MarkdownFormatter(Formatter):
     :include_methods _indentify:
     """
     FILE_EXT = '.md'
+    WRITE_DIRECTLY = True
 
     # ---------------------------------------------------------------------------------
     # MISC
@@ -710,6 +971,10 @@ class MarkdownFormatter(Formatter):
         """
         return "".join(["  " for _ in range(indent)])
 
+    @classmethod
+    def link(cls, text: str, target: str, code=False):
+        return "[`{}`]({})".format(text, target) if code else "[{}]({})".format(text, target)
+
     # ---------------------------------------------------------------------------------
     # MODULES
     # ---------------------------------------------------------------------------------
@@ -798,6 +1063,10 @@ class MarkdownFormatter(Formatter):
     def class_title(cls, title, prefix="", indent=0):
         return "{}* ## <a name='{}.{}'>class {}</a>".format(cls._indentify(indent), prefix, title, title)
 
+    @classmethod
+    def class_bases(cls, bases: list, indent=0):
+        return "{}> Bases: {}".format(cls._indentify(indent), ", ".join(bases))
+
     @classmethod
     def class_doc(cls, doc, indent=0):
         return "{}> {}".format(cls._indentify(indent), doc)
@@ -809,9 +1078,10 @@ class MarkdownFormatter(Formatter):
 
     @classmethod
     def class_constant(cls, name, value, prefix="", indent=0):
+        text = cls.VALUE_REPR.format(value)
         if isinstance(value, str):
-            value = "\"{}\"".format(value)
-        return "{}* <a name='{}.{}'>`{}`</a> = {}".format(cls._indentify(indent), prefix, name, name, value)
+            text = "\"{}\"".format(text)
+        return "{}* <a name='{}.{}'>`{}`</a> = {}".format(cls._indentify(indent), prefix, name, name, text)
 
     # EXTRA TITLES
     @classmethod
@@ -823,385 +1093,3082 @@ class MarkdownFormatter(Formatter):
         return "{}* ### Methods".format(cls._indentify(indent))
 
 
-class UserOptions:
+class FormatterSink:
     """
-    Collect together all the user modifiable options in one class to provide easy access and a simple way to pass
-    these parameters into the formatter's.
+    Writes the output of a Formatter into a text stream. Every name in Formatter.HOOKS is available on the sink with the
+    same parameters as the hook, and PyDocumentor passes whatever it returns to write(). Hooks that are still the no-op
+    from the base Formatter are swapped for one that returns None without building anything. A sink made by a
+    subclass can also have its hooks write into stream themselves and return None. Pieces are gathered until each flush(),
+    this is the sink of formatters without WRITE_DIRECTLY, the built-in ones get a StreamSink instead.
     """
-    # basic options
-    folder_mode = False
-    advanced_mode = False
-
-    directory = ""
-    output_directory = ""
-    output_folder_name = ""
-    output_format = None
+    def __init__(self, ft: Formatter, stream):
+        """
+        Set up the hooks of ft to write into stream
+        :param ft: the Formatter to write the output of
+        :param stream: the text stream to write to, anything with a write(str) method
+        """
+        self.stream = stream
+        self._pending = []
+        self._started = False
 
-    table_of_contents = True
+        # pieces are only gathered here, flush() drops the empty ones and joins them on newlines in one go
+        self.write = self._pending.append
 
-    # advanced options
-    add_css_to_each_file = True
-    collect_private_methods = False
+        overridden = self._overridden_hooks(type(ft))
+        for name in Formatter.HOOKS:
+            setattr(self, name, getattr(ft, name) if name in overridden else self._skip)
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _overridden_hooks(ft_class) -> frozenset:
+        """
+        Find the hooks a Formatter subclass actually implements, rather than inheriting from Formatter
+        :param ft_class: the Formatter subclass
+        :return: the names of the implemented hooks
+        """
+        overridden = set()
+        for name in Formatter.HOOKS:
+            owner = next(klass for klass in ft_class.__mro__ if name in vars(klass))
+            if owner is not Formatter:
+                overridden.add(name)
 
-class PyDocumentor:
-    """
-    Collect and export documentation in the appropriate format for whatever modules are specified in the console-based
-    interface. HTML and Markdown are both available as export formats.
-    """
-    HTML, MARK_DOWN = [i for i in range(2)]
-    FORMATS = [HTML, MARK_DOWN]
+        return frozenset(overridden)
 
     @staticmethod
-    def _analyze_function_docs(doc: str) -> dict:
+    def _skip(*args, **kwargs):
         """
-        Analyze the doc string of a function and look for documentation for parameters and return values based on the
-        same format that PyCharm uses.
-        :param doc: func.__doc__ from the function
-        :return: a dictionary of parameter_name -> doc, also included are FUNCTION which includes the documentation 
-        not about the parameters, and RETURN.
+        Stands in for any hook that isn't implemented
         """
-        data = {}
-        pattern = "(:\s*param |:\s*return:)"
-        splt = re.split(pattern, doc)
-
-        if not re.match(pattern, splt[0]):
-            data['FUNCTION'] = splt[0].strip()
-            del splt[0]
+        return None
 
-        for i in range(0, len(splt), 2):
-            if ":" in splt[i + 1]:
-                name, info = splt[i + 1].split(":", 1)
-            else:
-                name, info = '', splt[i + 1]
+    def flush(self):
+        """
+        Write everything passed to write() since the last flush into the stream, each non-empty piece on its own line
+        """
+        text = "\n".join(filter(None, self._pending))
+        self._pending.clear()
 
-            if "param" in splt[i]:
-                data[name.strip()] = info.strip()
-            elif "return" in splt[i]:
-                data["RETURN"] = info.strip()
+        if text:
+            if self._started:
+                self.stream.write("\n")
+            self._started = True
+            self.stream.write(text)
 
-        return data
 
-    @staticmethod
-    def _check_exclusion(doc, exclusion: str) -> bool:
+class StreamSink(FormatterSink):
+    """
+    A FormatterSink that writes each non-empty piece into the stream as soon as it is passed to write(), so nothing
+    is held onto however long a module is. What ends up in the stream is the same as with FormatterSink.
+    """
+    def __init__(self, ft: Formatter, stream):
         """
-        Check and see if this doc contains :exclusion: where exclusion is the parameter. 
-        :param doc: the doc to see if the module/class/function is excluded
-        :param exclusion: the exclusion level to look for in exclude, exclude_children, exclude_methods
-        :return: whether the correct pattern is found in doc based on exclusion
+        Set up the hooks of ft to write into stream
+        :param ft: the Formatter to write the output of
+        :param stream: the text stream to write to, anything with a write(str) method
         """
-        if doc:
-            return re.search(":[ \t]*{}[ \t]*:[ \t]*\n".format(exclusion), doc) is not None
-        else:
-            return False
+        super().__init__(ft, stream)
+        self.write = self._write_piece
+        self._stream_write = stream.write
+        self._separator = ""  # a new line once anything has been written
 
-    @staticmethod
-    def _file_writer(output_dir: str, data: dict, file_ext: str):
+    def _write_piece(self, text: str):
         """
-        Take the data and write it to output_dir
-        :param output_dir: the directory to write all the files in 
-        :param data: a dict of {file_path: formatted_string}
-        :param file_ext: The file extension that the data is formatted for
+        Write text into the stream, on a new line after anything already written
+        :param text: the piece of output, or None or "" for nothing
         """
-        for file_path in data.keys():
-            folder, file_name_ext = path_split(file_path)
-            file_name = str(file_name_ext.split('.')[0])
-            new_fp = path_join(output_dir, file_name + file_ext)
-
-            file = open(new_fp, 'w')
-            module_str = data[file_path]
-            file.write(module_str)
-            file.close()
+        if text:
+            self._stream_write(self._separator + text)
+            self._separator = "\n"
 
-    @staticmethod
-    def _format_functions(out: list, ft, funcs: list, prefix: str, indent: int):
+    def flush(self):
         """
-        Execute the proper Formatter function calls to add this block of functions to out
-        :param out: the list being used to collected all the formatted data
-        :param ft: the Formatter class to use to format the data
-        :param funcs: a list of the functions to format
-        :param prefix: the parent's name
-        :param indent: the indentation of this block of functions
+        Everything is already in the stream
         """
-        out.append(ft.function_block_start(indent=indent - 1))
-        for func in funcs:
-            out.append(ft.function_start(indent=indent))
-            out.append(ft.function_signature(func['name'], func['parameters'], func['return_annotation'], prefix=prefix,
-                                             indent=indent))
-            out.append(ft.function_body_start(indent=indent))
-            out.append(ft.function_doc(func['doc'], indent=indent + 1))
-            out.append(ft.function_parameters(func['parameters'], indent=indent + 1))
+        pass
 
-            if func['return']:
-                out.append(ft.function_return_parameter(func['return'], indent=indent + 1))
 
-            out.append(ft.function_body_end(indent=indent))
-            out.append(ft.function_end(indent=indent))
-        out.append(ft.function_block_end(indent=indent - 1))
+class RenderPlan:
+    """
+    A Formatter subclass compiled into plain functions that format each kind of node: a module, a class, a block of
+    functions at a given indent, and a constant. The functions are generated from TEMPLATE once per class. Hooks
+    that are still the base no-op are left out. Classmethod hooks that only read indent give the same output every
+    time for the same indent, so they are called once while compiling. Their output is baked in, with neighbouring
+    pieces fused into a single write.
+    """
+    # Each hook call is a single line of the form write(hook(..., indent=N)). {f}/{fo}/{fi} are the indents of the
+    # functions, their block and their bodies, which are filled in for each block of functions that is generated.
+    FUNCTIONS_TEMPLATE = """
+def functions_{f}(ft, write, flush, funcs, prefix):
+    write(function_block_start(indent={fo}))
+    for i, func in enumerate(funcs, 1):
+        write(function_start(indent={f}))
+        write(function_signature(func['name'], func['parameters'], func['return_annotation'], prefix=prefix,
+                                 indent={f}))
+        write(function_body_start(indent={f}))
+        write(function_doc(func['doc'], indent={fi}))
+        write(function_parameters(func['parameters'], indent={fi}))
+        if func['return']:
+            write(function_return_parameter(func['return'], indent={fi}))
+        write(function_body_end(indent={f}))
+        write(function_end(indent={f}))
+        if not i % 256:
+            flush()
+    write(function_block_end(indent={fo}))
+"""
+    TEMPLATE = FUNCTIONS_TEMPLATE.format(f=2, fo=1, fi=3) + FUNCTIONS_TEMPLATE.format(f=3, fo=2, fi=4) + """
+def constant(ft, write, const, prefix):
+    write(class_constant(const['name'], const['value'], prefix=prefix, indent=3))
+
+def class_(ft, write, flush, cls, parent):
+    write(class_start(indent=1))
+    write(class_title(cls['name'], prefix=parent, indent=1))
+    if cls['bases']:
+        write(class_bases(cls['bases'], indent=2))
+    write(class_body_start(indent=1))
+    write(class_doc(cls['doc'], indent=2))
+    if cls['constants']:
+        write(class_constants_title(indent=2))
+        write(class_constants_start(indent=2))
+        for const in cls['constants']:
+            constant(ft, write, const, cls['name'])
+        write(class_constants_end(indent=2))
+    if cls['static_methods']:
+        write(static_function_title(indent=2))
+        functions_3(ft, write, flush, cls['static_methods'], cls['name'])
+    if cls['methods']:
+        write(methods_title(indent=2))
+        functions_3(ft, write, flush, cls['methods'], cls['name'])
+    write(class_body_end(indent=1))
+    write(class_end(indent=1))
+    flush()
+
+def module(ft, write, flush, mod, table_of_contents):
+    write(top_of_file())
+    write(module_title(mod['name'], indent=0))
+    write(module_start(indent=0))
+    write(module_doc(mod['doc'], indent=1))
+    if table_of_contents:
+        write(table_of_contents_start(indent=0))
+        write(table_of_contents_title(prefix=mod['name'], indent=0))
+        write(table_of_contents_body_start(indent=0))
+        for func in mod['functions']:
+            write(table_of_contents_function(func['name'], prefix=mod['name'], indent=1))
+        for cls in mod['classes']:
+            write(table_of_contents_class(cls['name'], prefix=mod['name'], indent=1))
+            write(table_of_contents_class_start(indent=1))
+            for const in cls['constants']:
+                write(table_of_contents_constant(const['name'], prefix=cls['name'], indent=2))
+            for func in cls['static_methods']:
+                write(table_of_contents_function(func['name'], static=True, prefix=cls['name'], indent=2))
+            for func in cls['methods']:
+                write(table_of_contents_function(func['name'], prefix=cls['name'], indent=2))
+            write(table_of_contents_class_end(indent=1))
+        write(table_of_contents_body_end(indent=0))
+        write(table_of_contents_end(indent=0))
+        flush()
+    if mod['functions']:
+        write(module_functions_title(prefix=mod['name'], indent=1))
+        functions_2(ft, write, flush, mod['functions'], mod['name'])
+    for cls in mod['classes']:
+        class_(ft, write, flush, cls, mod['name'])
+    write(module_end(indent=0))
+    flush()
+"""
+    _HOOK_CALL = re.compile(r"^(\s*)write\((\w+)\((.*)\)\)$")
 
-    @staticmethod
-    def _get_exclusion(doc):
+    def __init__(self, ft_class):
         """
-        get a list of the excluded functions for a class if they are specified
-        :param doc: the doc to look through for excluded functions
-        :return: a set of the names of the excluded functions, or False if exclude_methods not in doc, or True
-        if it is in doc, but not methods are specified.
+        Compile the hooks of ft_class into the render functions
+        :param ft_class: the Formatter subclass to compile
         """
-        if doc:
-            match = re.search(":\s*exclude_methods\s*((?:\s*\w+\s*)(?:,\s*\w+\s*)*)?:", doc)
+        overridden = FormatterSink._overridden_hooks(ft_class)
+        lines = []  # generated lines, a fixed piece of output is kept as (leading_space, text) so it can be fused
+        used = {}  # generated function name -> names of the hooks it calls
+
+        # a hook call wrapped after a comma is matched as the one line it would be unwrapped
+        for line in re.sub(r",\n\s+", ", ", self.TEMPLATE).splitlines():
+            match = self._HOOK_CALL.match(line)
+            if line.startswith("def "):
+                used[line[4:line.index("(")]] = set()
+            if match is None or match.group(2) not in Formatter.HOOKS:
+                lines.append(line)
+                continue
+
+            space, name, args = match.groups()
+            indent = re.search(r"\bindent=(\d+)$", args)
+            if name not in overridden:
+                continue
+            elif indent is not None and self._is_fixed(ft_class, name):
+                text = getattr(ft_class, name)(indent=int(indent.group(1)))
+                if text:
+                    lines.append((space, text))
+            else:
+                lines.append("{}write({}({}))".format(space, name, args))
+                used[list(used)[-1]].add(name)
 
-            if match:
-                if match.group(1) is None:  # there was a match, but no function names were collected
-                    return True
-                else:
-                    return set([i.strip() for i in match.group(1).split(",")])
+        self.source = self._assemble(lines, used)
+        namespace = {}
+        exec(compile(self.source, "<render plan for {}>".format(ft_class.__name__), "exec"), namespace)
 
-        return False
+        self.module = namespace['module']
+        self.class_ = namespace['class_']
+        self.constant = namespace['constant']
+        self.functions = {2: namespace['functions_2'], 3: namespace['functions_3']}
 
     @staticmethod
-    def _get_exclusion_level(memb: dict) -> Optional[str]:
+    def _assemble(lines: list, used: dict) -> str:
         """
-        Get the broadest exclusion level in memb if there is one at all
-        :param memb: the module/class/function to see it it is excluded in some way
-        :return: the broadest level of exclusion, or None
+        Turn the generated lines into source. Neighbouring fixed pieces at the same level are fused into one write,
+        each function gets the hooks it calls bound as locals, and anything left without a body gets a pass.
+        :param lines: the generated lines, with fixed pieces as (leading_space, text)
+        :param used: generated function name -> names of the hooks it calls
+        :return: the source of the render functions
         """
-        ordered_levels = ['exclude', 'exclude_children', 'exclude_methods']
-        for level in ordered_levels:
-            if level in memb and memb[level]:
-                return level
+        fused = []
+        for line in lines:
+            if isinstance(line, tuple) and fused and isinstance(fused[-1], tuple) and fused[-1][0] == line[0]:
+                fused[-1] = (line[0], fused[-1][1] + "\n" + line[1])
+            else:
+                fused.append(line)
 
-        return None
+        out = []
+        for line in fused:
+            if isinstance(line, tuple):
+                line = "{}write({!r})".format(*line)
+            elif line.startswith("def "):
+                out.append(line)
+                out.extend("    {0} = ft.{0}".format(name) for name in sorted(used[line[4:line.index("(")]]))
+                continue
+            out.append(line)
+
+        source = []
+        for i, line in enumerate(out):
+            source.append(line)
+            if line.endswith(":"):
+                following = next((nxt for nxt in out[i + 1:] if nxt.strip()), "")
+                depth = len(line) - len(line.lstrip())
+                if len(following) - len(following.lstrip()) <= depth:
+                    source.append(" " * (depth + 4) + "pass")
+
+        return "\n".join(source) + "\n"
 
     @staticmethod
-    def _get_inclusion(doc) -> set:
+    def _is_fixed(ft_class, name: str) -> bool:
         """
-        get a list of the included functions for a class if they are specified
-        :param doc: the doc to look through for included functions
-        :return: a set of the names of the included functions
+        Check whether a hook's output can only depend on indent. It has to be a classmethod that can be called with just
+        indent, and that doesn't read any of its other parameters or anything global besides builtins.
+        :param ft_class: the Formatter subclass
+        :param name: the name of the hook
+        :return: whether the hook can be called once per indent while compiling
         """
-        out = set()
-        if doc:
-            match = re.search(":\s*include_methods\s*((?:\s*\w+\s*)(?:,\s*\w+\s*)*):", doc)
+        hook = next(vars(klass)[name] for klass in ft_class.__mro__ if name in vars(klass))
+        if not isinstance(hook, classmethod) or hook.__func__.__code__.co_freevars:
+            return False
+
+        if any(param.default is Parameter.empty and param.kind not in (Parameter.VAR_POSITIONAL, Parameter.VAR_KEYWORD)
+               for param in list(signature(hook.__func__).parameters.values())[1:] if param.name != 'indent'):
+            return False
 
-            if match:
-                out = set([i.strip() for i in match.group(1).split(",")])
+        code = hook.__func__.__code__
+        params = set(code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]) - {'cls', 'indent'}
+        for instruction in dis.get_instructions(code):
+            names = instruction.argval if isinstance(instruction.argval, tuple) else (instruction.argval,)
+            if instruction.opname.startswith('LOAD_FAST') and params.intersection(names):
+                return False
+            elif instruction.opname in ('LOAD_GLOBAL', 'LOAD_NAME') and not hasattr(builtins, instruction.argval):
+                return False
+            elif instruction.opname in ('LOAD_DEREF', 'LOAD_CLASSDEREF', 'STORE_GLOBAL', 'IMPORT_NAME'):
+                return False
 
-        return out
+        return True
 
     @staticmethod
-    def _is_method_excluded(name, included: set, exclude_children: bool, exclude_methods) -> bool:
+    @lru_cache(maxsize=None)
+    def for_formatter(ft_class) -> Optional['RenderPlan']:
         """
-        Determine whether or not this method is excluded from a class. 
-        :param name: the name of the method
-        :param included: a set containing the names of the included method for the class
-        :param exclude_children: whether or not all children are excluded for the class
-        :param exclude_methods: is True if all methods need to be excluded, False if no methods need excluded, or a set 
-            with names of methods if only specific methods need excluded
-        :return: a boolean of whether or not to exclude this method
+        Get the compiled plan for a Formatter subclass, compiling it the first time
+        :param ft_class: the Formatter subclass
+        :return: the RenderPlan, or None if the class has COMPILE_PLANS turned off
         """
-        if name in included:  # if this is specifically included, then there is no reason to exclude it
-            return False
-        elif exclude_children:  # exclude if all children are
-            return True
-        elif isinstance(exclude_methods, bool) and exclude_methods:  # exclude if all methods are
-            return True
-        elif isinstance(exclude_methods, set) and name in exclude_methods:  # exclude if method is specifically excluded
-            return True
-        else:  # no reason to exclude
-            return False
+        return RenderPlan(ft_class) if ft_class.COMPILE_PLANS else None
+
+
+class LiteralText:
+    """
+    Stand-in for a value that is only known as text, like the source of a default value found during static
+    collection. Formatting it gives back the text unchanged, so it renders the same way the real value would.
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+    def __format__(self, format_spec):
+        return format(self.text, format_spec)
+
+    def __repr__(self):
+        return "LiteralText({!r})".format(self.text)
+
+    def __eq__(self, other):
+        return isinstance(other, LiteralText) and other.text == self.text
+
+    def __hash__(self):
+        return hash(self.text)
+
+
+class CollectedInfo(MutableMapping):
+    """
+    Base of the classes collected data is kept in. Each field is a slot, so there isn't a dict for every module, class,
+    function and parameter, and names and annotations are interned so the many copies of names like self share one
+    string. Fields can still be read and written like keys, with a field set to EMPTY not being a key at all, so
+    everything written for the dicts the data used to be kept in keeps working. Formatting goes through to_dict()
+    instead, since the Formatter looks up the same few keys over and over.
+    """
+    __slots__ = ()
+    EMPTY = Parameter.empty  # the value of a field that isn't set
 
     @staticmethod
-    def _input_to_bool(yes_no: str) -> bool:
+    def _intern(value):
         """
-        Go from a yes/no response to a boolean
-        :param yes_no: a string of either y, yes, n, no
-        :return: a boolean of True for y or yes, else False
+        Intern value if it is a str
+        :param value: the value to intern
+        :return: the interned str, or value as it was
         """
-        return yes_no in ("yes", "y")
+        return sys.intern(value) if type(value) is str else value
 
-    @staticmethod
-    def _user_input(prompt: str, error="", validator=None) -> str:
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            if value is not CollectedInfo.EMPTY:
+                return value
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        setattr(self, key, CollectedInfo.EMPTY)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not CollectedInfo.EMPTY
+
+    def __iter__(self):
+        return (key for key in self.__slots__ if getattr(self, key) is not CollectedInfo.EMPTY)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, dict(self))
+
+    def to_dict(self) -> dict:
         """
-        Get user input, if there is a validator given, then continue to collect input until the data is good
-        :param prompt: The prompt to output
-        :param error: The error to show if there is a validator and it fails
-        :param validator: A callable to use to make sure the data is in a valid format
-        :return: the valid input
+        Copy the data into plain dicts and lists, all the way down
+        :return: the data the same way it would have been collected as dicts
         """
-        while True:
-            result = input(prompt + ": ").strip()
+        return {key: [item.to_dict() if isinstance(item, CollectedInfo) else item for item in value]
+                if isinstance(value, list) else value for key, value in self.items()}
 
-            if validator is None or (validator is not None and validator(result)):
-                return result
-            else:
-                print("<{}>".format(error), end="\n\n")
 
-    def __init__(self):
+class ParamInfo(CollectedInfo):
+    """
+    A parameter of a function. default, doc and annotation are EMPTY unless the parameter has them.
+    """
+    __slots__ = ('name', 'kind', 'default', 'doc', 'annotation')
+
+    def __init__(self, name: str, kind, default=CollectedInfo.EMPTY, doc: str = None, annotation: str = None):
         """
-        Collect format options and needed file/folder locations. Then collect the data from those files.
+        :param name: the name of the parameter
+        :param kind: the Parameter kind, like Parameter.VAR_POSITIONAL
+        :param default: the default value, EMPTY if there isn't one
+        :param doc: the documentation of the parameter, or None
+        :param annotation: the annotation as text, or None
         """
-        self.options = UserOptions()
-        self._collected_data = {}
-        self.options.folder_mode = self._input_to_bool(self._user_input("Collect all files in folder Y/N",
-                                                                        "Choice must be yes or no",
-                                                                        lambda x: x.lower() in ("yes", "no", "y", "n")))
-        self.options.advanced_mode = self._input_to_bool(self._user_input("Enter advanced mode Y/N",
-                                                                          "Choice must be yes or no",
-                                                                          lambda x: x.lower() in ("yes", "no", "y", "n"
-                                                                                                  )))
-        print()
+        self.name = sys.intern(name)
+        self.kind = kind
+        self.default = default
+        self.doc = self.EMPTY if doc is None else sys.intern(doc) if type(doc) is str else doc
+        self.annotation = self.EMPTY if annotation is None else \
+            sys.intern(annotation) if type(annotation) is str else annotation
 
-        self._collect_file_names()
-        self._get_user_options()
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        :param data: a dict with the same keys
+        :return: the ParamInfo
+        """
+        return cls(data['name'], data['kind'], data.get('default', cls.EMPTY), data.get('doc'), data.get('annotation'))
+
+    def to_dict(self) -> dict:
+        empty = self.EMPTY
+        data = {'name': self.name, 'kind': self.kind}
+        if self.default is not empty:
+            data['default'] = self.default
+        if self.doc is not empty:
+            data['doc'] = self.doc
+        if self.annotation is not empty:
+            data['annotation'] = self.annotation
+        return data
 
-        # import
-        modules = self._import_modules()
 
-        # collect module info
-        for mod in modules:
-            data = self._collect_module_info(mod)
-            if data is not None:
-                self._collected_data[mod.__file__] = data
+class FunctionInfo(CollectedInfo):
+    """
+    A function or method. The documentation of the return value is the 'return' field, which, being a keyword, can
+    only be read as info['return'].
+    """
+    __slots__ = ('name', 'doc', 'parameters', 'return', 'return_annotation')
 
-    def _collect_class_info(self, cls) -> Optional[dict]:
+    def __init__(self, name: str, doc: str, parameters: list, returns: str, return_annotation: str = None):
         """
-        Inspect a class and get its methods, constants, static_methods, doc and name. 
-        :param cls: The class to collect the data from
-        :return: A dictionary of the collected data with the keys as shown below, or None if class is excluded
-        """
-        inspected = getmembers(cls)
-        if not self._check_exclusion(cls.__doc__, 'exclude'):
-            data = {
-                'methods': [],
-                'constants': [],
-                'static_methods': [],
-                'doc': cls.__doc__.strip() if cls.__doc__ is not None else "",
-                'name': cls.__name__,
-            }
-            methods_functions = []
-            method_dict = {}
-
-            exclude_children = self._check_exclusion(data['doc'], 'exclude_children')
-            exclude_methods = self._get_exclusion(data['doc'])
-            include_methods = self._get_inclusion(data['doc'])
-
-            # collect names of method, constants and __dict__ to use to check for static methods
-            for name, memb in inspected:
-                if isfunction(memb) or ismethod(memb):  # check if it is a function or method
-                    if not self._is_method_excluded(name, include_methods, exclude_children, exclude_methods):
-                        methods_functions.append([name, memb])
-                elif not callable(memb) and name[0] != "_" and not exclude_children:  # constants
-                    data['constants'].append({'name': name, 'value': memb})
+        :param name: the name of the function
+        :param doc: the documentation of the function, without the parameters and return value
+        :param parameters: a list of ParamInfo
+        :param returns: the documentation of the return value
+        :param return_annotation: the return annotation as text, or None
+        """
+        self.name = sys.intern(name)
+        self.doc = doc
+        self.parameters = parameters
+        setattr(self, 'return', returns)
+        self.return_annotation = self._intern(return_annotation)
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        :param data: a dict with the same keys, its parameters can be dicts as well
+        :return: the FunctionInfo
+        """
+        return cls(data['name'], data['doc'], [ParamInfo.from_dict(param) for param in data['parameters']],
+                   data['return'], data['return_annotation'])
 
-                if name == '__dict__':
-                    method_dict = memb
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'doc': self.doc, 'parameters': [param.to_dict() for param in self.parameters],
+                'return': getattr(self, 'return'), 'return_annotation': self.return_annotation}
 
-            # use method_dict and names of functions or methods to determine whether it is a static function
-            for name, memb in methods_functions:
-                if name in method_dict:
-                    if isinstance(method_dict[name], staticmethod) and (self.options.collect_private_methods
-                                                                        or name[0] != "_" or name in include_methods):
-                            func = self._collect_function_info(memb)
-                            if func is not None:
-                                data['static_methods'].append(func)
-                    elif self.options.collect_private_methods or name[0] != '_' or name in include_methods:
-                        func = self._collect_function_info(memb)
-                        if func is not None:
-                            data['methods'].append(func)
 
-            return data
-        else:
-            return None
+class ConstantInfo(CollectedInfo):
+    """
+    A public constant of a class
+    """
+    __slots__ = ('name', 'value')
 
-    def _collect_file_names(self):
+    def __init__(self, name: str, value):
         """
-        Collect all the file names for the modules that will have documentation created. If in folder_mode, then
-        walk through the folder and all of its child folders recursively, collecting all Python files.
+        :param name: the name of the constant
+        :param value: the value, or a LiteralText of its source
         """
-        if self.options.folder_mode:
-            folder_path = self._user_input("Folder Path", "Invalid folder path", isdir)
-            self.options.directory = folder_path
-            self._file_paths = []
-
-            # walk through sub-directories and collect python files
-            for (dirpath, dirnames, file_names) in walk(folder_path):
-                for filename in file_names:
-                    if filename.endswith(".py"):
-                        self._file_paths.append(dirpath + filename)
-        else:
-            file_path = self._user_input("File Path", "Invalid file path", isfile)
-            self.options.directory, _ = path_split(file_path)
-            self._file_paths = [file_path]
+        self.name = self._intern(name)
+        self.value = value
 
-    def _collect_function_info(self, func: callable) -> Optional[dict]:
+    @classmethod
+    def from_dict(cls, data: dict):
         """
-        Inspect and collect the data from a function. Get its name, documentation, and parameters.
-        :param func: The function to inspect and collect data on
-        :return: A dictionary containing the keys shown below, or None if the function is excluded
+        :param data: a dict with the same keys
+        :return: the ConstantInfo
         """
-        if not self._check_exclusion(func.__doc__, 'exclude'):
-            annotations = getfullargspec(func).annotations
-            docs = PyDocumentor._analyze_function_docs(func.__doc__ if func.__doc__ is not None else "")
-            data = {
-                'name': func.__name__,
-                'doc': docs['FUNCTION'] if 'FUNCTION' in docs else "",
-                'parameters': [],
-                'return': docs['RETURN'].strip() if 'RETURN' in docs else "",
-                'return_annotation': annotations['return'].__name__ if 'return' in annotations else None
-            }
-            sig = signature(func)
+        return cls(data['name'], data['value'])
 
-            for param in sig.parameters.values():
-                param_data = {'name': param.name, 'kind': param.kind}
-                if param.default is not param.empty:
-                    param_data['default'] = param.default
-                if param.name in docs:
-                    param_data['doc'] = docs[param.name]
-                if param.name in annotations:
-                    param_data['annotation'] = annotations[param.name].__name__
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'value': self.value}
 
-                data['parameters'].append(param_data)
 
-            return data
-        else:
-            return None
+class ClassInfo(CollectedInfo):
+    """
+    A class, along with the constants and methods collected from it
+    """
+    __slots__ = ('name', 'doc', 'bases', 'constants', 'static_methods', 'methods')
 
-    def _collect_module_info(self, mod) -> Optional[dict]:
+    def __init__(self, name: str, doc: str, bases: list, constants=None, static_methods=None, methods=None):
         """
-        Inspect and collect data from the module given. Collect information from all of its classes and functions as
-        well.
-        :param mod: the module to inspect and collect data from 
-        :return: a dictionary with the keys shown below, or None if the module is excluded
+        :param name: the name of the class
+        :param doc: the documentation of the class
+        :param bases: the base classes as text, written the way they would be from inside the class's module
+        :param constants: a list of ConstantInfo
+        :param static_methods: a list of FunctionInfo
+        :param methods: a list of FunctionInfo
         """
-        inspected = getmembers(mod)
-        if not self._check_exclusion(mod.__doc__, 'exclude'):
-            data = {
-                'classes': [],
-                'functions': [],
-                'name': mod.__name__,
-                'doc': mod.__doc__.strip() if mod.__doc__ else "",
-            }
+        self.name = self._intern(name)
+        self.doc = doc
+        self.bases = [self._intern(base) for base in bases]
+        self.constants = constants if constants is not None else []
+        self.static_methods = static_methods if static_methods is not None else []
+        self.methods = methods if methods is not None else []
 
-            for name, memb in inspected:
-                if isclass(memb) and memb.__module__ == mod.__name__:
-                    cls = self._collect_class_info(memb)
-                    if cls is not None:
-                        data['classes'].append(cls)
-                # if this is a function, make sure it wasn't imported, and that it isn't private
-                elif isfunction(memb) and memb.__module__ == mod.__name__:
-                    if self.options.collect_private_methods or name[0] != "_":
-                        func = self._collect_function_info(memb)
-                        if func is not None:
-                            data['functions'].append(func)
-
-            return data
-        return None
-
-    def _get_user_options(self):
+    @classmethod
+    def from_dict(cls, data: dict):
         """
-        Collect options from the user that allows them to customize the output 
+        :param data: a dict with the same keys, its members can be dicts as well
+        :return: the ClassInfo
         """
-        # output directory
+        return cls(data['name'], data['doc'], data['bases'],
+                   [ConstantInfo.from_dict(const) for const in data['constants']],
+                   [FunctionInfo.from_dict(func) for func in data['static_methods']],
+                   [FunctionInfo.from_dict(func) for func in data['methods']])
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'doc': self.doc, 'bases': list(self.bases),
+                'constants': [const.to_dict() for const in self.constants],
+                'static_methods': [func.to_dict() for func in self.static_methods],
+                'methods': [func.to_dict() for func in self.methods]}
+
+
+class ModuleInfo(CollectedInfo):
+    """
+    A module, along with the classes and functions collected from it
+    """
+    __slots__ = ('name', 'doc', 'classes', 'functions')
+
+    def __init__(self, name: str, doc: str, classes=None, functions=None):
+        """
+        :param name: the name of the module
+        :param doc: the documentation of the module
+        :param classes: a list of ClassInfo
+        :param functions: a list of FunctionInfo
+        """
+        self.name = self._intern(name)
+        self.doc = doc
+        self.classes = classes if classes is not None else []
+        self.functions = functions if functions is not None else []
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        :param data: a dict with the same keys, its classes and functions can be dicts as well
+        :return: the ModuleInfo
+        """
+        return cls(data['name'], data['doc'], [ClassInfo.from_dict(cls_data) for cls_data in data['classes']],
+                   [FunctionInfo.from_dict(func) for func in data['functions']])
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'doc': self.doc, 'classes': [cls.to_dict() for cls in self.classes],
+                'functions': [func.to_dict() for func in self.functions]}
+
+
+class SymbolIndex:
+    """
+    Every documented module, class, function and constant by its fully qualified name, like module.Class.method, along
+    with the output file and anchor it is documented at. Names can also be looked up by any dotted suffix, like
+    Class.method or method, as long as only one symbol ends that way. Symbols are kept per module, so a single module
+    can be swapped out when it changes without rebuilding the rest. What each module's links were looked up as is
+    remembered too, so the modules whose links a change affects can be found and formatted again.
+    """
+    def __init__(self):
+        self._symbols = {}  # qualified name: (output file, anchor)
+        self._suffixes = {}  # dotted suffix: set of qualified names
+        self._modules = {}  # file path: [qualified names]
+        self._lookups = {}  # file path: (context, {name: link target or None}) from when the module was last linked
+
+    def __len__(self):
+        return len(self._symbols)
+
+    def _add(self, file_path: str, name: str, output: str, anchor: str):
+        """
+        Add a single symbol for the module at file_path
+        :param file_path: the path of the module the symbol is documented in
+        :param name: the qualified name of the symbol
+        :param output: the output file the symbol is documented in
+        :param anchor: the anchor of the symbol in output, or "" for the top of the file
+        """
+        self._symbols[name] = (output, anchor)
+        self._modules[file_path].append(name)
+
+        parts = name.split(".")
+        for i in range(1, len(parts)):
+            self._suffixes.setdefault(".".join(parts[i:]), set()).add(name)
+
+    def add_module(self, file_path: str, mod: dict, output: str):
+        """
+        Add every symbol of a module, replacing whatever was there for the module before
+        :param file_path: the path of the module
+        :param mod: the collected data of the module
+        :param output: the name of the file the module is exported to
+        """
+        self.remove_module(file_path)
+        self._modules[file_path] = []
+
+        mod_name = mod['name']
+        self._add(file_path, mod_name, output, "")
+        for func in mod['functions']:
+            self._add(file_path, "{}.{}".format(mod_name, func['name']), output, "{}.{}".format(mod_name, func['name']))
+
+        for cls in mod['classes']:
+            cls_name = "{}.{}".format(mod_name, cls['name'])
+            self._add(file_path, cls_name, output, cls_name)
+            for memb in cls['constants'] + cls['static_methods'] + cls['methods']:
+                self._add(file_path, "{}.{}".format(cls_name, memb['name']), output,
+                          "{}.{}".format(cls['name'], memb['name']))
+
+    def remove_module(self, file_path: str):
+        """
+        Remove every symbol of a module
+        :param file_path: the path of the module
+        """
+        for name in self._modules.pop(file_path, ()):
+            if self._symbols.pop(name, None) is None:
+                continue
+            parts = name.split(".")
+            for i in range(1, len(parts)):
+                names = self._suffixes.get(".".join(parts[i:]))
+                if names is not None:
+                    names.discard(name)
+                    if not names:
+                        del self._suffixes[".".join(parts[i:])]
+
+    def resolve(self, name: str, context="") -> Optional[str]:
+        """
+        Find where a name is documented. The name is tried inside of context first, then as a qualified name, and
+        last of all as the end of a qualified name.
+        :param name: the name to look up, as written
+        :param context: the qualified name of the module the name was found in
+        :return: the link target as file#anchor, or just file, or None if nothing matches
+        """
+        found = self._symbols.get("{}.{}".format(context, name)) if context else None
+        if found is None:
+            found = self._symbols.get(name)
+        if found is None:
+            names = self._suffixes.get(name)
+            if names is None or len(names) != 1:
+                return None
+            found = self._symbols[next(iter(names))]
+
+        output, anchor = found
+        return "{}#{}".format(output, anchor) if anchor else output
+
+    def remember(self, file_path: str, context: str, lookups: dict):
+        """
+        Record what the names in a module's links resolved to when it was formatted
+        :param file_path: the path of the module
+        :param context: the qualified name of the module, as passed to resolve()
+        :param lookups: name: what resolve() returned for it
+        """
+        self._lookups[file_path] = (context, lookups)
+
+    def retain(self, file_paths):
+        """
+        Remove the symbols of any module that isn't in file_paths
+        :param file_paths: the paths of the modules to keep
+        """
+        keep = set(file_paths)
+        for file_path in [file_path for file_path in self._modules if file_path not in keep]:
+            self.remove_module(file_path)
+        for file_path in [file_path for file_path in self._lookups if file_path not in keep]:
+            del self._lookups[file_path]
+
+    def stale(self, skip=()) -> list:
+        """
+        Find the modules whose links would come out differently now, because a symbol they link to was renamed or
+        removed, or one they couldn't link to has been added, since they were formatted
+        :param skip: the paths of modules not to check, like the ones just formatted
+        :return: the paths of the modules to format again
+        """
+        skip = set(skip)
+        return [file_path for file_path, (context, lookups) in self._lookups.items()
+                if file_path in self._modules and file_path not in skip and
+                any(self.resolve(name, context) != target for name, target in lookups.items())]
+
+    def load(self, index_path: str):
+        """
+        Add the symbols saved by save(), if there are any
+        :param index_path: the path of the saved index
+        """
+        try:
+            with open(index_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file)
+        except (OSError, ValueError):
+            return
+
+        for file_path, symbols in saved.get('symbols', {}).items():
+            self.remove_module(file_path)
+            self._modules[file_path] = []
+            for name, output, anchor in symbols:
+                self._add(file_path, name, output, anchor)
+        for file_path, (context, lookups) in saved.get('lookups', {}).items():
+            self._lookups[file_path] = (context, lookups)
+
+    def save(self, index_path: str):
+        """
+        Save the index so the symbols of modules that aren't collected next time are still known
+        :param index_path: the path to save the index to
+        """
+        saved = {'symbols': {file_path: [[name, *self._symbols[name]] for name in names]
+                             for file_path, names in self._modules.items()},
+                 'lookups': {file_path: lookups for file_path, lookups in self._lookups.items()
+                             if file_path in self._modules}}
+        OutputWriter.replace_if_changed(index_path, json.dumps(saved, separators=(',', ':')))
+
+
+class SearchIndex:
+    """
+    The index behind the search page of an HTML export. Each module adds its symbols along with an inverted index from
+    the tokens of their names and docs to those symbols. When written, the tokens of every module are merged into
+    shards by their first two characters, so the page only loads the shards for what is typed and then the modules of
+    the results it shows. Contributions are kept per module, so one module can be swapped out when it changes.
+    """
+    SEARCH_PAGE = path_join(path_split(__file__)[0], "search.html")
+    FOLDER = "search"  # inside of the export directory
+    KINDS = {'module': "M", 'class': "C", 'function': "F", 'method': "m", 'static method': "s", 'constant': "k"}
+    STOP_WORDS = frozenset(("an", "and", "are", "as", "at", "be", "by", "for", "if", "in", "is", "it", "of", "on", "or",
+                            "the", "this", "that", "to", "with"))
+
+    _WORDS = re.compile(r"[A-Za-z0-9]+")
+    _NAME_PARTS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z0-9]+")  # snake_case and CamelCase both split into words
+
+    def __init__(self):
+        self._modules = {}  # file path: [module id, output file, symbols, {token: [symbol, or -1 - symbol for docs]}]
+        self._changed = set()  # ids of the modules whose file needs to be written
+
+    @classmethod
+    def _name_tokens(cls, name: str) -> set:
+        """
+        Get the tokens of a name, the whole name and each word in it
+        :param name: the unqualified name
+        :return: a set of lowercase tokens
+        """
+        tokens = {part.lower() for part in cls._NAME_PARTS.findall(name)}
+        tokens.add("".join(cls._WORDS.findall(name)).lower())
+        return {token for token in tokens if len(token) > 1}
+
+    @classmethod
+    def _doc_tokens(cls, doc: str) -> set:
+        """
+        Get the tokens of a docstring
+        :param doc: the docstring
+        :return: a set of lowercase tokens
+        """
+        tokens = {word.lower() for word in cls._WORDS.findall(doc)} if doc else set()
+        return {token for token in tokens if len(token) > 1 and token not in cls.STOP_WORDS}
+
+    def add_module(self, file_path: str, mod: dict, output: str):
+        """
+        Add the symbols and tokens of a module, replacing whatever was there for the module before
+        :param file_path: the path of the module
+        :param mod: the collected data of the module
+        :param output: the name of the file the module is exported to
+        """
+        symbols, found = [], {}  # found is token: {symbol: whether or not the token is in its name}
+
+        def add(name, kind, anchor, doc, context=""):
+            number = len(symbols)
+            symbols.append([name, self.KINDS[kind], anchor])
+            for token in self._doc_tokens(doc) | self._name_tokens(context):
+                found.setdefault(token, {}).setdefault(number, False)
+            for token in self._name_tokens(name.rsplit(".", 1)[-1]):
+                found.setdefault(token, {})[number] = True
+
+        def add_functions(funcs, kind, parent, anchor_prefix):
+            for func in funcs:
+                add("{}.{}".format(parent, func['name']), kind, "{}.{}".format(anchor_prefix, func['name']),
+                    func['doc'], anchor_prefix if kind != 'function' else "")
+
+        mod_name = mod['name']
+        add(mod_name, 'module', "", mod['doc'])
+        add_functions(mod['functions'], 'function', mod_name, mod_name)
+        for cls in mod['classes']:
+            cls_name = "{}.{}".format(mod_name, cls['name'])
+            add(cls_name, 'class', cls_name, cls['doc'])
+            for const in cls['constants']:
+                add("{}.{}".format(cls_name, const['name']), 'constant', "{}.{}".format(cls['name'], const['name']),
+                    "", cls['name'])
+            add_functions(cls['static_methods'], 'static method', cls_name, cls['name'])
+            add_functions(cls['methods'], 'method', cls_name, cls['name'])
+
+        postings = {token: [number if in_name else -1 - number for number, in_name in sorted(numbers.items())]
+                    for token, numbers in found.items()}
+        module_id = hashlib.sha1(file_path.encode('utf-8')).hexdigest()[:12]
+        self._modules[file_path] = [module_id, output, symbols, postings]
+        self._changed.add(module_id)
+
+    def remove_module(self, file_path: str):
+        """
+        Remove everything a module added
+        :param file_path: the path of the module
+        """
+        self._modules.pop(file_path, None)
+
+    def retain(self, file_paths):
+        """
+        Remove every module that isn't in file_paths
+        :param file_paths: the paths of the modules to keep
+        """
+        keep = set(file_paths)
+        for file_path in [file_path for file_path in self._modules if file_path not in keep]:
+            self.remove_module(file_path)
+
+    def load(self, index_path: str):
+        """
+        Add the modules saved by save(), if there are any
+        :param index_path: the path of the saved index
+        """
+        try:
+            with open(index_path, 'r', encoding='utf-8') as file:
+                self._modules.update(json.load(file))
+        except (OSError, ValueError):
+            pass
+
+    def save(self, index_path: str):
+        """
+        Save what every module added, so modules that aren't collected next time are still searchable
+        :param index_path: the path to save the index to
+        """
+        OutputWriter.replace_if_changed(index_path, json.dumps(self._modules, separators=(',', ':')))
+
+    def write(self, dir_path: str):
+        """
+        Write the search page, the token shards and the file of every module that changed into dir_path. Shards that
+        come out the same aren't written again, and any left over from modules that are gone are removed.
+        :param dir_path: the export directory
+        """
+        folder = path_join(dir_path, self.FOLDER)
+        if not isdir(folder):
+            mkdir(folder)
+
+        shards, expected = {}, set()
+        for file_path in sorted(self._modules):
+            module_id, output, symbols, postings = self._modules[file_path]
+            for token, numbers in postings.items():
+                shards.setdefault(token[:2], {}).setdefault(token, []).extend([module_id] + numbers)
+
+            name = "m_{}.js".format(module_id)
+            expected.add(name)
+            if module_id in self._changed or not isfile(path_join(folder, name)):
+                OutputWriter.replace_if_changed(path_join(folder, name), "PyDocSearch.module({}, {}, {});\n".format(
+                    json.dumps(module_id), json.dumps(output), json.dumps(symbols, separators=(',', ':'))))
+        self._changed = set()
+
+        for key, tokens in shards.items():
+            name = "t_{}.js".format(key)
+            expected.add(name)
+            OutputWriter.replace_if_changed(path_join(folder, name), "PyDocSearch.shard({}, {});\n".format(
+                json.dumps(key), json.dumps(tokens, separators=(',', ':'), sort_keys=True)))
+
+        for (_, _, file_names) in walk(folder):
+            for name in file_names:
+                if name.endswith(".js") and name not in expected:
+                    remove(path_join(folder, name))
+            break
+
+        with open(self.SEARCH_PAGE, 'r', encoding='utf-8') as file:
+            OutputWriter.replace_if_changed(path_join(dir_path, "search.html"), file.read())
+
+
+class BuildProfiler:
+    """
+    Records where the time and memory of a build goes. Each phase of the build, and the import, collect, render and
+    write stages of each module, gets its wall time, CPU time, and from tracemalloc, the memory it left allocated and
+    the most it had allocated at once. Hot paths add to counters, and each call of a Formatter hook is counted once
+    instrument() has been called on the Formatter. With slowest set, every module is also run under cProfile so the
+    slowest ones can be dumped afterwards.
+    """
+    MODULE_STAGES = ('import', 'collect', 'render', 'write')
+
+    def __init__(self, slowest=0):
+        """
+        Start profiling, which also starts tracemalloc if it isn't already tracing
+        :param slowest: how many of the slowest modules to keep cProfile stats for
+        """
+        self.slowest = slowest
+        self.phases = {}  # phase: stats
+        self.modules = {}  # file path: {stage: stats}
+        self.counters = {}  # event: count
+        self._profiles = {}  # file path: cProfile.Profile
+        self._merged_stats = {}  # file path: cProfile stats sent back from a collection process
+        self._local = local()  # a stack of [start_memory, peak_memory] for each measurement in progress in the thread
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def _add_stats(total: dict, stats: dict):
+        """
+        Add stats into total, the peaks are combined by taking the highest
+        :param total: the stats to add to
+        :param stats: the stats to add
+        """
+        for key, value in stats.items():
+            total[key] = max(total.get(key, 0), value) if key == 'peak' else total.get(key, 0) + value
+
+    @contextmanager
+    def _measure(self, clock):
+        """
+        Measure the block inside of the with statement. Measurements can be nested, the peak memory of an inner one
+        counts towards the outer one as well.
+        :param clock: the CPU time clock to use
+        :return: a dict that the stats are put into once the block is done
+        """
+        stack = self._local.__dict__.setdefault('stack', [])
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1][1] = max(stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        stack.append([current, current])
+
+        stats = {}
+        wall, cpu = perf_counter(), clock()
+        try:
+            yield stats
+        finally:
+            stats['wall'] = perf_counter() - wall
+            stats['cpu'] = clock() - cpu
+            after, peak = tracemalloc.get_traced_memory()
+            start, inner_peak = stack.pop()
+            peak = max(peak, inner_peak)
+            stats['allocated'] = after - start
+            stats['peak'] = peak - start
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+
+    def count(self, event: str, amount=1):
+        """
+        Add to the counter of an event
+        :param event: the name of the event
+        :param amount: how much to add
+        """
+        self.counters[event] = self.counters.get(event, 0) + amount
+
+    def instrument(self, ft: Formatter):
+        """
+        Count each call of the Formatter's hooks, by shadowing them with counting versions on the instance. Both
+        FormatterSink and the compiled RenderPlan look the hooks up on the instance, so both are counted.
+        :param ft: the Formatter to count the hooks of
+        """
+        def counted(name, hook):
+            event = "hook " + name
+
+            def call(*args, **kwargs):
+                self.counters[event] = self.counters.get(event, 0) + 1
+                return hook(*args, **kwargs)
+            return call
+
+        for name in FormatterSink._overridden_hooks(type(ft)):
+            setattr(ft, name, counted(name, getattr(ft, name)))
+
+    def merge(self, file_path: str, recorded: dict):
+        """
+        Add what another profiler recorded for a module, like one in a collection process
+        :param file_path: the path of the module
+        :param recorded: what take() gave back in the other profiler
+        """
+        for stage, stats in recorded['stages'].items():
+            self._add_stats(self.modules.setdefault(file_path, {}).setdefault(stage, {}), stats)
+        for event, amount in recorded['counters'].items():
+            self.count(event, amount)
+        if recorded['profile'] is not None:
+            self._merged_stats[file_path] = recorded['profile']
+
+    @contextmanager
+    def module(self, file_path: str, stage: str):
+        """
+        Measure a stage of a single module, use as a with statement
+        :param file_path: the path of the module
+        :param stage: one of MODULE_STAGES
+        """
+        profile = None
+        if self.slowest:
+            profile = self._profiles.setdefault(file_path, cProfile.Profile())
+            try:
+                profile.enable()
+            except ValueError:  # newer versions only allow one profiler at a time, across every thread
+                profile = None
+
+        try:
+            with self._measure(thread_time) as stats:
+                yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            self._add_stats(self.modules.setdefault(file_path, {}).setdefault(stage, {}), stats)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Measure a phase of the build, use as a with statement
+        :param name: the name of the phase
+        """
+        with self._measure(process_time) as stats:
+            yield
+        self._add_stats(self.phases.setdefault(name, {}), stats)
+
+    def module_totals(self) -> list:
+        """
+        Total up the stages of each module
+        :return: a list of (file_path, total stats), slowest first by wall time
+        """
+        totals = []
+        for file_path, stages in self.modules.items():
+            total = {}
+            for stats in stages.values():
+                self._add_stats(total, stats)
+            totals.append((file_path, total))
+
+        return sorted(totals, key=lambda item: item[1].get('wall', 0), reverse=True)
+
+    def take(self, file_path: str) -> dict:
+        """
+        Remove and return everything recorded so far for a module, along with the counters, so it can be sent back
+        from a collection process and merged into the main profiler
+        :param file_path: the path of the module
+        :return: the recorded stages, counters and cProfile stats (or None)
+        """
+        profile = self._profiles.pop(file_path, None)
+        if profile is not None:
+            profile.create_stats()
+        recorded = {'stages': self.modules.pop(file_path, {}), 'counters': self.counters,
+                    'profile': profile.stats if profile is not None else None}
+        self.counters = {}
+        return recorded
+
+    def dump_slowest(self, folder: str) -> list:
+        """
+        Write the cProfile stats of the slowest modules into folder, readable with pstats or snakeviz
+        :param folder: the folder to write the stats into
+        :return: the paths of the files written
+        """
+        if not self.slowest:
+            return []
+        if not isdir(folder):
+            mkdir(folder)
+
+        written = []
+        for rank, (file_path, _) in enumerate(self.module_totals()[:self.slowest], 1):
+            stats_path = path_join(folder, "{:02}_{}.prof".format(rank, path_split(file_path)[1].rsplit(".", 1)[0]))
+            sources = []
+            if file_path in self._merged_stats:
+                with open(stats_path, 'wb') as file:
+                    marshal.dump(self._merged_stats[file_path], file)
+                sources.append(stats_path)
+            if file_path in self._profiles:
+                sources.append(self._profiles[file_path])
+
+            if sources:
+                pstats.Stats(*sources).dump_stats(stats_path)
+                written.append(stats_path)
+
+        return written
+
+    def report(self, modules=10) -> str:
+        """
+        Create a readable report of the phases, the slowest modules and the counters
+        :param modules: how many of the slowest modules to list
+        :return: the report
+        """
+        def row(name, stats, width=34):
+            return "{:<{}}{:>10.3f}{:>10.3f}{:>12}{:>12}".format(
+                name[-width:], width, stats.get('wall', 0), stats.get('cpu', 0),
+                self._format_bytes(stats.get('allocated', 0)), self._format_bytes(stats.get('peak', 0)))
+
+        header = "{:<34}{:>10}{:>10}{:>12}{:>12}".format("", "wall (s)", "cpu (s)", "allocated", "peak")
+        lines = ["Build Profile:", header.replace(" " * 6, "Phase ", 1)]
+        lines.extend(row(name, stats) for name, stats in self.phases.items())
+
+        totals = self.module_totals()
+        if totals:
+            lines.extend(["", "Slowest Modules ({} of {}):".format(min(modules, len(totals)), len(totals)), header])
+            for file_path, total in totals[:modules]:
+                lines.append(row(file_path, total))
+                stages = self.modules[file_path]
+                lines.extend(row("    " + stage, stages[stage]) for stage in self.MODULE_STAGES if stage in stages)
+
+        if self.counters:
+            lines.extend(["", "Counters:"])
+            hooks = {event: amount for event, amount in self.counters.items() if event.startswith("hook ")}
+            for event, amount in sorted(self.counters.items()):
+                if event not in hooks:
+                    lines.append("{:<34}{:>10}".format(event, amount))
+            if hooks:
+                lines.append("{:<34}{:>10}".format("Formatter hook calls", sum(hooks.values())))
+                for event, amount in sorted(hooks.items(), key=lambda item: item[1], reverse=True)[:5]:
+                    lines.append("{:<34}{:>10}".format("    " + event[5:], amount))
+
+        return "\n".join(lines)
+
+    @staticmethod
+    def _format_bytes(amount: int) -> str:
+        """
+        Format a number of bytes with a unit
+        :param amount: the number of bytes
+        :return: the formatted amount
+        """
+        for unit in ("B", "KB", "MB"):
+            if abs(amount) < 1024:
+                return "{:.0f} {}".format(amount, unit) if unit == "B" else "{:.1f} {}".format(amount, unit)
+            amount /= 1024
+        return "{:.1f} GB".format(amount)
+
+    def to_json(self) -> dict:
+        """
+        Everything recorded, in a form that can be saved as JSON
+        :return: the phases, modules and counters
+        """
+        return {'phases': self.phases, 'modules': self.modules, 'counters': self.counters}
+
+
+DocstringInfo = namedtuple('DocstringInfo', ['summary', 'params', 'returns', 'exclude', 'exclude_children',
+                                             'exclude_methods', 'include_methods'])
+DocstringInfo.__doc__ = """
+Everything PyDocumentor reads from a docstring. summary is the text before any :param: or :return:, params maps each
+parameter name to its doc and returns is the :return: doc. exclude and exclude_children are booleans,
+exclude_methods is False, True if all methods are excluded, or a frozenset of method names, and include_methods is
+a frozenset of method names.
+"""
+
+
+class ModuleFinder:
+    """
+    Find the Python files in a folder with os.scandir, skipping a whole folder as soon as a rule excludes it. Rules are
+    written like .gitignore patterns and come from DEFAULT_EXCLUDES, from every .gitignore found along the way (each
+    one applying to the folder it is in), and from the exclude patterns given, which can't be overridden. When include
+    patterns are given, only files matching one of them are kept. Links to folders are followed, but no folder is
+    searched twice, so links that loop back to a parent are harmless.
+    """
+    DEFAULT_EXCLUDES = (".git/", ".hg/", ".svn/", ".tox/", ".nox/", ".venv/", "venv/", "node_modules/", "__pycache__/",
+                        "build/", "dist/", ".eggs/", "*.egg-info/", "site-packages/", ".mypy_cache/", ".pytest_cache/")
+    IGNORE_FILE = ".gitignore"
+
+    def __init__(self, root: str, include=(), exclude=(), use_gitignore=True, threads=1):
+        """
+        :param root: the folder to search
+        :param include: patterns of the files to keep, every Python file is kept if there are none
+        :param exclude: patterns of the files and folders to skip, on top of DEFAULT_EXCLUDES
+        :param use_gitignore: whether or not to skip what .gitignore files ignore
+        :param threads: how many threads to search the folders directly inside of root with
+        """
+        self.root = root
+        self.use_gitignore = use_gitignore
+        self.threads = threads
+        self._defaults = [rule for rule in map(self._compile, self.DEFAULT_EXCLUDES) if rule is not None]
+        self._excludes = [rule for rule in map(self._compile, exclude) if rule is not None]
+        self._includes = [rule for rule in map(self._compile, include) if rule is not None]
+        self._seen = set()  # (device, inode) of every folder searched
+        self._lock = Lock()
+
+    @staticmethod
+    def _compile(pattern: str, base="") -> Optional[tuple]:
+        """
+        Compile a .gitignore pattern. A pattern with a / anywhere but the end is matched against the whole path from
+        base, otherwise against any trailing part of it. A trailing / only matches folders, a leading ! re-includes
+        what an earlier pattern excluded, * and ? don't match / and ** matches any number of folders.
+        :param pattern: the pattern
+        :param base: the path, relative to the root, of the folder the pattern applies to
+        :return: (base, regex, negated, folders_only), or None if the line isn't a pattern
+        """
+        pattern = pattern.rstrip()
+        if not pattern or pattern.startswith("#"):
+            return None
+
+        negated = pattern.startswith("!")
+        pattern = pattern[1:] if negated else pattern
+        if pattern.startswith("\\"):  # escaped leading ! or #
+            pattern = pattern[1:]
+        folders_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        if not pattern:
+            return None
+
+        regex, i = "" if anchored else "(?:.*/)?", 0
+        while i < len(pattern):
+            if pattern.startswith("**/", i):
+                regex, i = regex + "(?:.*/)?", i + 3
+            elif pattern.startswith("**", i):
+                regex, i = regex + ".*", i + 2
+            elif pattern[i] == "*":
+                regex, i = regex + "[^/]*", i + 1
+            elif pattern[i] == "?":
+                regex, i = regex + "[^/]", i + 1
+            elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+                end = pattern.index("]", i + 2)
+                body = pattern[i + 1:end]
+                regex += "[" + ("^" + body[1:] if body.startswith("!") else body).replace("\\", "\\\\") + "]"
+                i = end + 1
+            else:
+                regex, i = regex + re.escape(pattern[i]), i + 1
+
+        return base, re.compile(regex + r"\Z", re.DOTALL), negated, folders_only
+
+    @staticmethod
+    def _matches(rules: list, rel_path: str, is_folder: bool) -> bool:
+        """
+        Check a path against rules, where the last rule to match decides
+        :param rules: compiled rules from _compile()
+        :param rel_path: the path relative to the root, using / as the separator
+        :param is_folder: whether or not the path is a folder
+        :return: whether or not the path is excluded, or for include rules, included
+        """
+        matched = False
+        for base, regex, negated, folders_only in rules:
+            if folders_only and not is_folder:
+                continue
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                path = rel_path[len(base) + 1:]
+            else:
+                path = rel_path
+            if matched == negated and regex.match(path):
+                matched = not negated
+
+        return matched
+
+    def _excluded(self, rules: list, rel_path: str, is_folder: bool) -> bool:
+        """
+        :param rules: the default and .gitignore rules that apply to the folder the path is in
+        :param rel_path: the path relative to the root, using / as the separator
+        :param is_folder: whether or not the path is a folder
+        :return: whether or not the path is excluded
+        """
+        return self._matches(rules, rel_path, is_folder) or self._matches(self._excludes, rel_path, is_folder)
+
+    def _folder_rules(self, folder: str, rel_path: str, rules: list, names) -> list:
+        """
+        Add the rules of a folder's .gitignore to the rules of its parent
+        :param folder: the path of the folder
+        :param rel_path: the path of the folder relative to the root
+        :param rules: the rules that apply to the parent folder
+        :param names: the names of the entries in the folder
+        :return: the rules that apply inside of the folder
+        """
+        if not self.use_gitignore or self.IGNORE_FILE not in names:
+            return rules
+
+        try:
+            with open(path_join(folder, self.IGNORE_FILE), 'r', encoding='utf-8', errors='replace') as file:
+                added = [self._compile(line.rstrip("\r\n"), rel_path) for line in file]
+        except OSError:
+            return rules
+        return rules + [rule for rule in added if rule is not None]
+
+    def _first_visit(self, entry_stat) -> bool:
+        """
+        Record that a folder is being searched
+        :param entry_stat: the stat of the folder
+        :return: whether or not this is the first time the folder has come up
+        """
+        key = (entry_stat.st_dev, entry_stat.st_ino)
+        with self._lock:
+            if key in self._seen:
+                return False
+            self._seen.add(key)
+            return True
+
+    def _context(self, folder: str) -> Optional[tuple]:
+        """
+        Work out the rules that apply inside of a folder under the root, by going down to it from the root
+        :param folder: the folder, which has to be the root or inside of it
+        :return: (path relative to the root, the rules that apply to its parent), or None if the folder, or one of its
+        parents, is excluded
+        """
+        rel_path = relpath(folder, self.root).replace(sep, "/")
+        rel_path = "" if rel_path == "." else rel_path
+        current, rules = self.root, self._defaults
+
+        parts = rel_path.split("/") if rel_path else []
+        for i, part in enumerate(parts):
+            try:
+                names = listdir(current)
+            except OSError:
+                return None
+
+            rules = self._folder_rules(current, "/".join(parts[:i]), rules, names)
+            current = path_join(current, part)
+            if self._excluded(rules, "/".join(parts[:i + 1]), True):
+                return None
+
+        return rel_path, rules
+
+    def _search(self, folder: str, rel_path: str, rules: list, files: Optional[list], folders: list,
+                top_level: list = None):
+        """
+        Search a folder and everything under it, depth first with each folder's files before its subfolders
+        :param folder: the path of the folder
+        :param rel_path: the path of the folder relative to the root
+        :param rules: the rules that apply to the parent folder
+        :param files: the list to add the Python files found to, or None to only find folders
+        :param folders: the list to add the folders searched to
+        :param top_level: if given, the folders directly inside of this one are added to it as (folder, rel_path,
+            rules) instead of being searched
+        """
+        stack = [(folder, rel_path, rules)]
+        while stack:
+            folder, rel_path, rules = stack.pop()
+            try:
+                with scandir(folder) as scan:
+                    entries = sorted(scan, key=lambda entry: entry.name)
+            except OSError:  # removed, or not readable
+                continue
+
+            folders.append(folder)
+            rules = self._folder_rules(folder, rel_path, rules, {entry.name for entry in entries})
+            subfolders = []
+            for entry in entries:
+                entry_rel = rel_path + "/" + entry.name if rel_path else entry.name
+                try:
+                    is_folder = entry.is_dir()
+                    if not is_folder and (files is None or not entry.name.endswith(".py") or not entry.is_file()):
+                        continue
+                    if self._excluded(rules, entry_rel, is_folder):
+                        continue
+                    if is_folder:
+                        if self._first_visit(entry.stat()):
+                            subfolders.append((entry.path, entry_rel, rules))
+                    elif not self._includes or self._matches(self._includes, entry_rel, False):
+                        files.append(entry.path)
+                except OSError:  # a broken link, or removed while searching
+                    continue
+
+            if top_level is not None:
+                top_level.extend(subfolders)
+                top_level = None
+            else:
+                stack.extend(reversed(subfolders))
+
+    def _walk(self, folder: str, files: Optional[list]) -> list:
+        """
+        Search from a folder, spreading the folders directly inside of it across threads when there is more than one
+        :param folder: the folder to start from, the root or a folder inside of it
+        :param files: the list to add the Python files found to, or None to only find folders
+        :return: the folders searched
+        """
+        context = self._context(folder)
+        if context is None:
+            return []
+        rel_path, rules = context
+
+        # the folder and its parents up to the root are already being searched, links back to them are skipped
+        self._seen.clear()
+        parts = rel_path.split("/") if rel_path else []
+        try:
+            for i in range(len(parts) + 1):
+                self._first_visit(path_stat(path_join(self.root, *parts[:i])))
+        except OSError:
+            return []
+
+        folders, top_level = [], []
+        self._search(folder, rel_path, rules, files, folders, top_level if self.threads > 1 else None)
+        if not top_level:
+            return folders
+
+        def search(args):
+            found_files, found_folders = ([] if files is not None else None), []
+            self._search(*args, found_files, found_folders)
+            return found_files, found_folders
+
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            for found_files, found_folders in executor.map(search, top_level):
+                if files is not None:
+                    files.extend(found_files)
+                folders.extend(found_folders)
+        return folders
+
+    def find(self) -> list:
+        """
+        Find every Python file to collect
+        :return: the paths of the files, each folder's files in order by name before the files of its subfolders
+        """
+        files = []
+        self._walk(self.root, files)
+        return files
+
+    def folders(self, folder: str = None) -> list:
+        """
+        Find every folder that find() searches, like for watching them for changes
+        :param folder: a folder inside of the root to start from, defaults to the root
+        :return: the paths of the folders, starting with folder itself, or an empty list if folder is excluded
+        """
+        return self._walk(self.root if folder is None else folder, None)
+
+
+class FileWatcher:
+    """
+    Wait for Python files to change in a set of folders. Where inotify is available, it is used through ctypes so a
+    save is noticed right away, otherwise wait() just sleeps for poll_interval and the caller compares modification
+    times to find what changed.
+    """
+    IN_MODIFY, IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO = 0x2, 0x8, 0x40, 0x80
+    IN_CREATE, IN_DELETE, IN_IGNORED, IN_Q_OVERFLOW, IN_ISDIR = 0x100, 0x200, 0x8000, 0x4000, 0x40000000
+    IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+    WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, len, followed by a name of len bytes
+
+    def __init__(self, folders: list, recursive=True, poll_interval=0.5, finder: ModuleFinder = None):
+        """
+        Start watching folders, falling back to polling if inotify can't be used or runs out of watches
+        :param folders: the folders to watch
+        :param recursive: whether or not to watch every folder inside of folders as well
+        :param poll_interval: how long wait() sleeps for when polling
+        :param finder: if given, only the folders it would search are watched when recursive
+        """
+        self.recursive = recursive
+        self.poll_interval = poll_interval
+        self.finder = finder
+        self._watches = {}  # watch descriptor: folder
+        self._fd = None
+
+        libc = self._load_libc()
+        if libc is not None:
+            fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+            if fd >= 0:
+                self._libc, self._fd = libc, fd
+                if not all(self._add_folder(folder) for folder in folders):
+                    self.close()
+
+    @staticmethod
+    def _load_libc():
+        """
+        Load the C library if it has inotify
+        :return: the library, or None if inotify isn't available
+        """
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or "libc.so.6", use_errno=True)
+            libc.inotify_init1, libc.inotify_add_watch  # only Linux has these
+            return libc
+        except (OSError, AttributeError):
+            return None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def _add_folder(self, folder: str) -> bool:
+        """
+        Watch a folder, and every folder in it if recursive
+        :param folder: the folder to watch
+        :return: whether or not every folder could be watched
+        """
+        if not self.recursive:
+            folders = [folder]
+        elif self.finder is not None:
+            folders = self.finder.folders(folder)
+        else:
+            folders = [dirpath for dirpath, _, _ in walk(folder)]
+        for dirpath in folders:
+            wd = self._libc.inotify_add_watch(self._fd, fsencode(dirpath), self.WATCH_MASK)
+            if wd < 0:
+                return False
+            self._watches[wd] = dirpath
+        return True
+
+    def _read_events(self) -> bool:
+        """
+        Read every event waiting on the inotify file descriptor
+        :return: whether or not any of them could have changed a Python file
+        """
+        relevant = False
+        while True:
+            try:
+                buffer = fd_read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _, length = self.EVENT.unpack_from(buffer, offset)
+                name = buffer[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b"\0").decode(
+                    errors='replace')
+                offset += self.EVENT.size + length
+
+                if mask & self.IN_IGNORED:
+                    self._watches.pop(wd, None)
+                elif mask & (self.IN_Q_OVERFLOW | self.IN_ISDIR):
+                    relevant = True
+                    if mask & (self.IN_CREATE | self.IN_MOVED_TO) and self.recursive and wd in self._watches:
+                        if not self._add_folder(path_join(self._watches[wd], name)):
+                            self.close()  # out of watches, carry on by polling
+                            return True
+                elif name.endswith(".py"):
+                    relevant = True
+
+    def close(self):
+        """
+        Stop watching, any later calls to wait() will poll
+        """
+        if self._fd is not None:
+            fd_close(self._fd)
+            self._fd = None
+            self._watches = {}
+
+    def settle(self, quiet: float):
+        """
+        Wait until nothing has changed for quiet seconds, so a burst of saves is handled as a single change
+        :param quiet: how many seconds without any events counts as settled
+        """
+        if self._fd is None:
+            sleep(quiet)
+        else:
+            while self._fd is not None and select([self._fd], [], [], quiet)[0]:
+                self._read_events()
+
+    def wait(self, timeout: float = None) -> bool:
+        """
+        Wait for a Python file in one of the folders to change
+        :param timeout: the most seconds to wait for, defaults to poll_interval
+        :return: False if nothing changed, True if something might have
+        """
+        timeout = self.poll_interval if timeout is None else timeout
+        if self._fd is None:
+            sleep(timeout)
+            return True
+
+        return bool(select([self._fd], [], [], timeout)[0]) and self._read_events()
+
+
+class WorkerPool:
+    """
+    A pool of processes that each run function on one item at a time, much like ProcessPoolExecutor.map(), except
+    that an item can only ever cost its own result. If it takes longer than timeout seconds, its process is killed, and
+    if the process dies, it's replaced. Either way the item comes back as a failure and every other item carries on.
+    Where the resource module is available, each process is also limited to memory_limit MB of address space.
+    Processes are only started as they are needed, and are kept between calls to map() until the pool is closed.
+    """
+    BACKLOG = 4  # items per process that can be finished ahead of the next one to come back, before waiting on it
+
+    def __init__(self, processes: int, function: callable, initializer: callable = None, initargs=(), timeout=0.0,
+                 memory_limit=0, context=None):
+        """
+        :param processes: how many processes to run at once
+        :param function: what to run on each item in the processes, it has to be picklable by reference
+        :param initializer: run once in each process before any items, also picklable by reference
+        :param initargs: the arguments for initializer
+        :param timeout: seconds each item may take before its process is killed, 0 for no limit
+        :param memory_limit: MB of address space each process may use, 0 for no limit
+        :param context: the multiprocessing context to start the processes with, defaults to the default one
+        """
+        self.processes = max(processes, 1)
+        self.function = function
+        self.initializer = initializer
+        self.initargs = initargs
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._context = context if context is not None else multiprocessing.get_context()
+        self._workers = {}  # connection: process
+        self._idle = []  # connections to the processes waiting for an item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @staticmethod
+    def _serve(conn, function: callable, initializer: callable, initargs: tuple, memory_limit: int):
+        """
+        The loop each process runs, items come in as (index, item) and go back as (index, ok, result or error message,
+        whether or not the process is still going). A process that ran out of memory stops, since anything could
+        have been left half done.
+        """
+        if memory_limit and resource is not None:
+            limit = memory_limit * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        if initializer is not None:
+            initializer(*initargs)
+
+        while True:
+            try:
+                task = conn.recv()
+            except EOFError:
+                return
+            if task is None:
+                return
+
+            index, item = task
+            try:
+                conn.send((index, True, function(item), True))
+            except MemoryError:
+                conn.send((index, False, "ran out of memory", False))
+                return
+            except BaseException as error:  # modules can raise anything while they are imported, even SystemExit
+                conn.send((index, False, "{}: {}".format(type(error).__name__, error), True))
+
+    def _start(self):
+        """
+        Start a new process
+        :return: the connection to it
+        """
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=self._serve, daemon=True, args=(
+            child_conn, self.function, self.initializer, self.initargs, self.memory_limit))
+        process.start()
+        child_conn.close()
+        self._workers[conn] = process
+        return conn
+
+    def _stop(self, conn) -> Optional[int]:
+        """
+        Kill a process, whatever it is doing
+        :param conn: the connection to the process
+        :return: the exit code of the process
+        """
+        process = self._workers.pop(conn)
+        if process.is_alive():
+            process.kill()
+        process.join()
+        conn.close()
+        return process.exitcode
+
+    def close(self):
+        """
+        Stop every process, waiting a moment for idle ones to finish up on their own
+        """
+        for conn, process in self._workers.items():
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        for conn in list(self._workers):
+            self._workers[conn].join(0.5)
+            self._stop(conn)
+        self._idle = []
+
+    def map(self, items):
+        """
+        Run function on every item
+        :param items: an iterable of the items
+        :return: a generator of (item, ok, result), in the same order as items, where result is an error message
+        when ok is False
+        """
+        items = enumerate(items)
+        idle, busy, done = self._idle, {}, {}  # busy is connection: (index, item, deadline), done is index: result
+        next_index, exhausted = 0, False
+        try:
+            while True:
+                while next_index in done:
+                    yield done.pop(next_index)
+                    next_index += 1
+
+                while not exhausted and len(busy) < self.processes and \
+                        len(busy) + len(done) < self.processes * self.BACKLOG:
+                    task = next(items, None)
+                    if task is None:
+                        exhausted = True
+                        break
+
+                    conn = idle.pop() if idle else self._start()
+                    try:
+                        conn.send(task)
+                    except OSError:  # the process died while it was idle
+                        self._stop(conn)
+                        conn = self._start()
+                        conn.send(task)
+                    busy[conn] = task + (perf_counter() + self.timeout if self.timeout else None,)
+
+                if not busy:
+                    if exhausted and not done:
+                        return
+                    continue
+
+                deadlines = [deadline for _, _, deadline in busy.values() if deadline is not None]
+                timeout = max(min(deadlines) - perf_counter(), 0) if deadlines else None
+                for conn in wait_for_connections(list(busy), timeout):
+                    index, item, _ = busy.pop(conn)
+                    try:
+                        _, ok, result, alive = conn.recv()
+                    except (EOFError, OSError):  # crashed, or exited while importing
+                        ok, result, alive = False, None, False
+                    if not alive:
+                        exit_code = self._stop(conn)
+                        result = result or "the process exited with code {}".format(exit_code)
+                    else:
+                        idle.append(conn)
+                    done[index] = (item, ok, result)
+
+                now = perf_counter()
+                for conn, (index, item, deadline) in list(busy.items()):
+                    if deadline is not None and deadline <= now:
+                        del busy[conn]
+                        self._stop(conn)
+                        done[index] = (item, False, "timed out after {:g}s".format(self.timeout))
+        finally:
+            for conn in list(busy):  # stopped early, what they are working on is never going to be picked up
+                self._stop(conn)
+
+
+class OutputWriter:
+    """
+    Write exported files on a few threads, so writing overlaps with rendering. A file that already holds exactly what
+    would be written is left alone, so its modification time only changes when its content does, and anything else is
+    written to a temporary file that is renamed over it, so a half-written file is never seen. Every path always goes
+    to the same thread, so two writes to one path finish in the order they were submitted.
+    """
+    THREADS = 4
+
+    def __init__(self, threads=THREADS):
+        """
+        :param threads: how many threads to write with, 0 to write each file as it is submitted
+        """
+        self._executors = [ThreadPoolExecutor(1, thread_name_prefix="writer") for _ in range(threads)]
+        self._futures = []
+        self._lock = Lock()
+        self.written = 0
+        self.unchanged = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    @staticmethod
+    def replace_if_changed(path: str, text: str) -> bool:
+        """
+        Write text to path, unless path already holds exactly that. The size is compared first, so reading the old
+        file back is only needed when it might match.
+        :param path: the path of the file
+        :param text: the new content
+        :return: True if the file was written, False if it was already up to date
+        """
+        content = text.encode('utf-8')
+        try:
+            if path_stat(path).st_size == len(content):
+                with open(path, 'rb') as file:
+                    if file.read() == content:
+                        return False
+        except OSError:  # doesn't exist yet
+            pass
+
+        temp_path = "{}.{}-{}.tmp".format(path, getpid(), get_ident())
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(content)
+            replace(temp_path, path)
+        except BaseException:
+            if path_exists(temp_path):
+                remove(temp_path)
+            raise
+        return True
+
+    @staticmethod
+    @contextmanager
+    def replacing(path: str):
+        """
+        The same as replace_if_changed() for content too big to build up as a string. The new content is written into a
+        temporary file, which replaces path when the block finishes, unless path already held exactly that. If the
+        block raises, path is left as it was.
+        :param path: the path of the file
+        :return: the temporary file, open for writing text
+        """
+        temp_path = "{}.{}-{}.tmp".format(path, getpid(), get_ident())
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                yield file
+
+            size = path_stat(temp_path).st_size
+            if path_exists(path) and path_stat(path).st_size == size:
+                with open(temp_path, 'rb') as new, open(path, 'rb') as old:
+                    while True:
+                        chunk = new.read(1 << 20)
+                        if chunk != old.read(1 << 20):
+                            break
+                        elif not chunk:  # the same all the way through
+                            remove(temp_path)
+                            return
+            replace(temp_path, path)
+        except BaseException:
+            if path_exists(temp_path):
+                remove(temp_path)
+            raise
+
+    def _write(self, path: str, text: str, measure):
+        with measure:
+            changed = self.replace_if_changed(path, text)
+        with self._lock:
+            if changed:
+                self.written += 1
+            else:
+                self.unchanged += 1
+
+    def close(self):
+        """
+        Wait for every write, then stop the threads
+        """
+        try:
+            self.wait()
+        finally:
+            for executor in self._executors:
+                executor.shutdown()
+
+    def submit(self, path: str, text: str, measure=None):
+        """
+        Queue text to be written to path
+        :param path: the path of the file
+        :param text: the new content
+        :param measure: a context manager to write the file inside of, like PyDocumentor._measure()
+        """
+        if not self._executors:
+            self._write(path, text, measure or nullcontext())
+        else:
+            executor = self._executors[hash(path) % len(self._executors)]
+            self._futures.append(executor.submit(self._write, path, text, measure or nullcontext()))
+
+    def wait(self):
+        """
+        Wait for every write submitted so far, raising the first error any of them hit
+        """
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+
+
+class UserOptions:
+    """
+    Collect together all the user modifiable options in one class to provide easy access and a simple way to pass
+    these parameters into the formatter's. The class attributes are the defaults, every instance gets its own copy of
+    them, so changing the options of one PyDocumentor never changes another's.
+    """
+    # basic options
+    folder_mode = False
+    advanced_mode = False
+
+    directory = ""
+    output_directory = ""
+    output_folder_name = ""
+    output_format = 0  # PyDocumentor.HTML or PyDocumentor.MARK_DOWN
+
+    table_of_contents = True
+
+    # advanced options
+    include_patterns = ()  # in folder_mode, only collect files matching one of these .gitignore style patterns
+    exclude_patterns = ()  # in folder_mode, skip files and folders matching these, on top of the default excludes
+    use_gitignore = True  # in folder_mode, skip what .gitignore files ignore
+    discovery_threads = 1  # threads to search the top-level folders with in folder_mode, 0 uses every core
+    add_css_to_each_file = True
+    minify_css = False  # strip comments and whitespace from the stylesheet before it is added or written
+    collect_private_methods = False
+    static_collection = False  # read the source with ast instead of importing each module
+    processes = 1  # processes to collect modules with, 0 uses every core
+    module_timeout = 0  # seconds a module may take to import and collect before its process is killed, 0 for no limit
+    module_memory_limit = 0  # MB of memory each collection process may use, 0 for no limit
+    forkserver = False  # start collection processes from a forkserver that has already imported preload_modules
+    preload_modules = ()  # for the forkserver to import, if empty the third-party packages modules share are found
+    incremental = False  # only rebuild modules whose source changed since the last export
+    save_collected = False  # save the collected data in the export folder so it can be rendered again later
+    streaming = False  # collect, format and write one module at a time instead of holding everything in memory
+    pipeline_queue_size = 0  # when streaming, overlap collecting, formatting and writing through queues of this size
+    watch = False  # after exporting, keep running and rebuild the modules that change
+    link_symbols = True  # link annotations, base classes and `names` in docstrings to where they are documented
+    search_index = True  # for HTML, add a search page along with the index it searches
+    profile = False  # record the time and memory each phase and module takes, see BuildProfiler
+    profile_slowest = 0  # when profiling, save cProfile stats for this many of the slowest modules
+
+    def __init__(self, **options):
+        """
+        :param options: option name=value for any options that shouldn't start at their default
+        """
+        for name, value in self.defaults().items():
+            setattr(self, name, value)
+        for name, value in options.items():
+            if not hasattr(type(self), name) or name.startswith("_") or callable(getattr(type(self), name)):
+                raise TypeError("<{}> is not an option".format(name))
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join("{}={!r}".format(name, value)
+                                                              for name, value in vars(self).items()))
+
+    @classmethod
+    def defaults(cls) -> dict:
+        """
+        Get the default of every option
+        :return: a dict of option name -> default value
+        """
+        return {name: getattr(cls, name) for name in dir(cls)
+                if not name.startswith("_") and not callable(getattr(cls, name))}
+
+    def copy(self, **options):
+        """
+        Copy these options
+        :param options: option name=value for any options that should be different in the copy
+        :return: the new UserOptions
+        """
+        return type(self)(**dict(vars(self), **options))
+
+
+class PyDocumentor:
+    """
+    Collect and export documentation in the appropriate format for whatever modules are specified in the console-based
+    interface. HTML and Markdown are both available as export formats.
+    """
+    HTML, MARK_DOWN = [i for i in range(2)]
+    FORMATS = [HTML, MARK_DOWN]
+
+    MANIFEST_FILE = ".pydocumentor_manifest.json"  # kept in the export folder for incremental builds
+    SYMBOLS_FILE = ".pydocumentor_symbols.json"  # the SymbolIndex, kept next to the manifest
+    SEARCH_FILE = ".pydocumentor_search.json"  # what each module added to the SearchIndex, kept next to the manifest
+    IR_EXT = ".pydocir"
+    IR_FILE = "collected" + IR_EXT  # collected data saved in the export folder for render-only runs
+    PARAMETER_KINDS = (Parameter.POSITIONAL_ONLY, Parameter.POSITIONAL_OR_KEYWORD, Parameter.VAR_POSITIONAL,
+                       Parameter.KEYWORD_ONLY, Parameter.VAR_KEYWORD)  # indexed by the kind's value in the IR
+
+    PROFILE_FOLDER = "profile"  # where profile.json and the cProfile stats are saved inside the export folder
+    WATCH_DEBOUNCE = 0.15  # seconds without any changes before a watched rebuild starts
+
+    # every marker _parse_docstring() looks for, found together in one pass over the docstring
+    _DIRECTIVES = re.compile(r":\s*(?:(?P<param>param )|(?P<return>return:))"
+                             r"|(?P<exclude>:[ \t]*exclude[ \t]*:[ \t]*\n)"
+                             r"|(?P<exclude_children>:[ \t]*exclude_children[ \t]*:[ \t]*\n)"
+                             r"|(?P<exclude_methods>:\s*exclude_methods\s*"
+                             r"(?P<exclude_names>(?:\s*\w+\s*)(?:,\s*\w+\s*)*)?:)"
+                             r"|(?P<include_methods>:\s*include_methods\s*"
+                             r"(?P<include_names>(?:\s*\w+\s*)(?:,\s*\w+\s*)*):)")
+
+    _BACKTICKED = re.compile(r"`([A-Za-z_][\w.]*)`")  # names in docstrings that might be linked
+    _IDENTIFIER = re.compile(r"[A-Za-z_][\w.]*")  # names in annotations that might be linked
+    _LINES = re.compile(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$")  # the line endings the parser counts
+
+    _IMPORTS = re.compile(r"^[ \t]*(?:from[ \t]+(\w+)[\w.]*[ \t]+import\b|import[ \t]+([\w., \t]+))", re.M)
+    PRELOAD_SHARED_BY = 2  # how many modules have to import a package for it to be preloaded automatically
+
+    _worker = None  # the instance used by _collect_in_worker() inside of a collection process
+
+    @staticmethod
+    def _collect_in_worker(task: tuple) -> tuple:
+        """
+        Collect a single module inside of a worker process started with _start_worker(). A pool can be shared by builds
+        with different options, so the process's instance is set up again whenever the options change.
+        :param task: (file_path, options) the path of the module to collect and the UserOptions of the build
+        :return: (file_path, data, recorded) where data is the picklable collected data, or None if the module is
+        excluded, and recorded is what the worker's BuildProfiler recorded for the module, or None when not profiling
+        """
+        file_path, options = task
+        worker = PyDocumentor._worker
+        if worker is None or vars(worker.options) != vars(options):
+            worker = PyDocumentor._worker = PyDocumentor(options=options)
+        data = PyDocumentor._picklable(worker._collect_path(file_path))
+        return file_path, data, worker._profiler.take(file_path) if worker._profiler is not None else None
+
+    @staticmethod
+    def _file_writer(output_dir: str, data: dict, file_ext: str):
+        """
+        Take the data and write it to output_dir, leaving any file that is already up to date alone
+        :param output_dir: the directory to write all the files in 
+        :param data: a dict of {file_path: formatted_string}
+        :param file_ext: The file extension that the data is formatted for
+        """
+        for file_path, module_str in data.items():
+            OutputWriter.replace_if_changed(path_join(output_dir, PyDocumentor._output_name(file_path, file_ext)),
+                                            module_str)
+
+    @staticmethod
+    def _decode_ir(line: str) -> tuple:
+        """
+        Decode a single module written by _encode_ir()
+        :param line: a line of an IR file
+        :return: (file_path, data) with the collected data as it was before being encoded
+        """
+        file_path, data = json.loads(line)
+        kinds = PyDocumentor.PARAMETER_KINDS
+
+        for cls in data['classes']:
+            cls.setdefault('bases', [])  # saved before base classes were collected
+            for const in cls['constants']:
+                if isinstance(const['value'], dict):
+                    const['value'] = LiteralText(const['value']['text'])
+
+        for func in PyDocumentor._module_functions(data):
+            for param in func['parameters']:
+                param['kind'] = kinds[param['kind']]
+                if 'default' in param and isinstance(param['default'], dict):
+                    param['default'] = LiteralText(param['default']['text'])
+
+        return file_path, ModuleInfo.from_dict(data)
+
+    @staticmethod
+    def _encode_ir(file_path: str, data: dict) -> str:
+        """
+        Encode the collected data of a module as a single line of JSON. Parameter kinds become their value, and any
+        default or constant that isn't a str, int, float, bool or None is stored as {'text': formatted_value}, which
+        comes back as a LiteralText that formats exactly the same, as long as Formatter.VALUE_REPR isn't changed.
+        :param file_path: the path of the module
+        :param data: the collected data of the module
+        :return: the encoded line, without a newline
+        """
+        def encode(value):
+            if value is None or type(value) in (str, int, float, bool):
+                return value
+            return {'text': Formatter.VALUE_REPR.format(value)}
+
+        classes = []
+        for cls in data['classes']:
+            classes.append(dict(cls, constants=[{'name': const['name'], 'value': encode(const['value'])}
+                                                for const in cls['constants']]))
+        encoded = dict(data, classes=classes)
+
+        def encode_functions(funcs):
+            out = []
+            for func in funcs:
+                params = []
+                for param in func['parameters']:
+                    param = dict(param, kind=int(param['kind']))
+                    if 'default' in param:
+                        param['default'] = encode(param['default'])
+                    params.append(param)
+                out.append(dict(func, parameters=params))
+            return out
+
+        encoded['functions'] = encode_functions(data['functions'])
+        for cls in classes:
+            cls['static_methods'] = encode_functions(cls['static_methods'])
+            cls['methods'] = encode_functions(cls['methods'])
+
+        return json.dumps([file_path, encoded], separators=(',', ':'))
+
+    @staticmethod
+    def _file_hash(file_path: str) -> str:
+        """
+        Hash the contents of a file so changes can be found without comparing timestamps
+        :param file_path: the path of the file
+        :return: the hex digest of the file's contents
+        """
+        with open(file_path, 'rb') as file:
+            return hashlib.sha1(file.read()).hexdigest()
+
+    @staticmethod
+    def _get_exclusion_level(memb: dict) -> Optional[str]:
+        """
+        Get the broadest exclusion level in memb if there is one at all
+        :param memb: the module/class/function to see it it is excluded in some way
+        :return: the broadest level of exclusion, or None
+        """
+        ordered_levels = ['exclude', 'exclude_children', 'exclude_methods']
+        for level in ordered_levels:
+            if level in memb and memb[level]:
+                return level
+
+        return None
+
+    @staticmethod
+    def _is_method_excluded(name, included: set, exclude_children: bool, exclude_methods) -> bool:
+        """
+        Determine whether or not this method is excluded from a class. 
+        :param name: the name of the method
+        :param included: a set containing the names of the included method for the class
+        :param exclude_children: whether or not all children are excluded for the class
+        :param exclude_methods: is True if all methods need to be excluded, False if no methods need excluded, or a set 
+            with names of methods if only specific methods need excluded
+        :return: a boolean of whether or not to exclude this method
+        """
+        if name in included:  # if this is specifically included, then there is no reason to exclude it
+            return False
+        elif exclude_children:  # exclude if all children are
+            return True
+        elif isinstance(exclude_methods, bool) and exclude_methods:  # exclude if all methods are
+            return True
+        # exclude if method is specifically excluded
+        elif isinstance(exclude_methods, (set, frozenset)) and name in exclude_methods:
+            return True
+        else:  # no reason to exclude
+            return False
+
+    @staticmethod
+    def _input_to_bool(yes_no: str) -> bool:
+        """
+        Go from a yes/no response to a boolean
+        :param yes_no: a string of either y, yes, n, no
+        :return: a boolean of True for y or yes, else False
+        """
+        return yes_no in ("yes", "y")
+
+    @staticmethod
+    def _load_ir(ir_path: str) -> dict:
+        """
+        Load collected data saved to an IR file by export(), none of the documented modules are imported
+        :param ir_path: the path of the IR file
+        :return: a dict of {file_path: data}, just like _collected_data
+        """
+        collected = {}
+        with open(ir_path, 'r', encoding='utf-8') as file:
+            header = json.loads(file.readline())
+            if header.get('pydocumentor') is None:
+                raise ValueError("<{}> is not a PyDocumentor IR file".format(ir_path))
+
+            for line in file:
+                file_path, data = PyDocumentor._decode_ir(line)
+                collected[file_path] = data
+
+        return collected
+
+    @staticmethod
+    def _literal_value(source: str, node):
+        """
+        Get the value of an expression node without executing anything. Literals are evaluated, anything else is kept
+        as its source text
+        :param source: the source of the module the node is from
+        :param node: the expression node
+        :return: the literal value, or a LiteralText of the expression
+        """
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return LiteralText(PyDocumentor._source_text(source, node))
+
+    @staticmethod
+    def _module_functions(data: dict):
+        """
+        Go through every function in the collected data of a module, including the methods and static methods of
+        its classes
+        :param data: the collected data of a module
+        :return: a generator of the data of each function
+        """
+        yield from data['functions']
+        for cls in data['classes']:
+            yield from cls['static_methods']
+            yield from cls['methods']
+
+    @staticmethod
+    def _output_name(file_path: str, file_ext: str) -> str:
+        """
+        Get the name of the file that the documentation for a module is exported to
+        :param file_path: the path of the module
+        :param file_ext: the file extension of the format being exported
+        :return: the name of the exported file
+        """
+        _, file_name_ext = path_split(file_path)
+        return str(file_name_ext.split('.')[0]) + file_ext
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _parse_docstring(doc: Optional[str]) -> DocstringInfo:
+        """
+        Read everything PyDocumentor uses out of a docstring in a single scan. Parameters and the return value use the
+        same format that PyCharm uses, and each directive described at the top of this module is picked up. Results are
+        cached by the text of the docstring, so a method shared by many classes is only parsed once.
+        :param doc: the docstring, or None
+        :return: a DocstringInfo of what was found
+        """
+        params, returns = {}, ""
+        exclude = exclude_children = False
+        exclude_methods, include_methods = False, frozenset()
+        if not doc:
+            return DocstringInfo("", MappingProxyType(params), returns, exclude, exclude_children, exclude_methods,
+                                 include_methods)
+
+        sections = []  # (kind, start, end) of each :param or :return: marker
+        for match in PyDocumentor._DIRECTIVES.finditer(doc):
+            kind = match.lastgroup
+            if kind in ('param', 'return'):
+                sections.append((kind, match.start(), match.end()))
+            elif kind == 'exclude':
+                exclude = True
+            elif kind == 'exclude_children':
+                exclude_children = True
+            elif kind == 'exclude_methods' and exclude_methods is False:
+                names = match.group('exclude_names')
+                exclude_methods = True if names is None else frozenset(i.strip() for i in names.split(","))
+            elif kind == 'include_methods' and not include_methods:
+                include_methods = frozenset(i.strip() for i in match.group('include_names').split(","))
+
+        summary = doc[:sections[0][1]].strip() if sections else doc.strip()
+        for i, (kind, _, end) in enumerate(sections):
+            text = doc[end:sections[i + 1][1]] if i + 1 < len(sections) else doc[end:]
+            name, info = text.split(":", 1) if ":" in text else ('', text)
+
+            if kind == 'param':
+                params[name.strip()] = info.strip()
+            else:
+                returns = info.strip()
+
+        return DocstringInfo(summary, MappingProxyType(params), returns, exclude, exclude_children, exclude_methods,
+                             include_methods)
+
+    @staticmethod
+    def _pipeline_stage(work: callable, source: Queue, target: Optional[Queue], errors: list):
+        """
+        Run one stage of a streaming export on its own thread. Items are taken from source until None comes through,
+        and the result of work on each is put into target. After a failure, the remaining items are still taken so
+        the earlier stages never block, but nothing more is done with them.
+        :param work: the callable to run on each item
+        :param source: the queue to take items from
+        :param target: the queue to put results into, or None if this is the last stage
+        :param errors: a list shared by all stages that any exception is added to
+        """
+        while True:
+            item = source.get()
+            if item is None:
+                break
+            if errors:
+                continue
+
+            try:
+                result = work(item)
+            except Exception as e:
+                errors.append(e)
+                continue
+
+            if target is not None:
+                target.put(result)
+
+        if target is not None:
+            target.put(None)
+
+    @staticmethod
+    def _picklable(data: Optional[dict]) -> Optional[dict]:
+        """
+        Make sure the collected data of a module can be sent back from a worker process, and cheaply. Default and
+        constant values other than None, bool, int and float are replaced by what they will be formatted as, so values
+        that can't be pickled make it back, and huge ones aren't pickled only to be cut short by the formatter.
+        :param data: the collected data of a module
+        :return: the same data, with the values replaced
+        """
+        if data is None:
+            return data
+
+        bounded = Formatter.VALUE_REPR
+
+        def fix(container, key):
+            value = container[key]
+            if type(value) is str:
+                container[key] = bounded.format(value)
+            elif value is not None and type(value) not in (bool, int, float):
+                container[key] = LiteralText(bounded.format(value))
+
+        for cls in data['classes']:
+            for const in cls['constants']:
+                fix(const, 'value')
+
+        for func in PyDocumentor._module_functions(data):
+            for param in func['parameters']:
+                if 'default' in param:
+                    fix(param, 'default')
+
+        return data
+
+    @staticmethod
+    def _select_members(wanted: list, name: str) -> Optional[list]:
+        """
+        Check a member against the symbols asked for by render_symbols()
+        :param wanted: the rest of each name asked for, split at its dots into a tuple of glob patterns
+        :param name: the name of the member
+        :return: None if the member is wanted with everything in it, otherwise the patterns of its own members that
+        are wanted, which is empty when the member isn't wanted at all
+        """
+        inner = [patterns[1:] for patterns in wanted if fnmatchcase(name, patterns[0])]
+        return None if () in inner else inner
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _source_lines(source: str) -> list:
+        """
+        Split a module's source into lines the same way the parser numbers them, each encoded since column offsets are
+        in bytes. Cached, as splitting the whole source again for every node makes collection quadratic.
+        :param source: the source of a module
+        :return: a list of the encoded lines, each with its line ending
+        """
+        return [line.encode('utf-8') for line in PyDocumentor._LINES.findall(source)]
+
+    @staticmethod
+    def _source_text(source: str, node) -> str:
+        """
+        Get the source text of a node, falling back to unparsing it if the segment can't be found. This is
+        ast.get_source_segment(), but with the lines of the source cached.
+        :param source: the source of the module the node is from
+        :param node: the node to get the text of
+        :return: the text of the node as written in the source
+        """
+        lines = PyDocumentor._source_lines(source)
+        if getattr(node, 'end_lineno', None) is None or node.end_lineno > len(lines):
+            return ast.unparse(node)
+
+        first, last = node.lineno - 1, node.end_lineno - 1
+        if first == last:
+            return lines[first][node.col_offset:node.end_col_offset].decode('utf-8')
+
+        segment = [lines[first][node.col_offset:]] + lines[first + 1:last] + [lines[last][:node.end_col_offset]]
+        return b"".join(segment).decode('utf-8')
+
+    @staticmethod
+    def _split_patterns(patterns: str) -> tuple:
+        """
+        Split a comma separated list of patterns typed in by the user
+        :param patterns: the patterns
+        :return: a tuple of the patterns, without any blank ones
+        """
+        return tuple(pattern.strip() for pattern in patterns.split(",") if pattern.strip())
+
+    @staticmethod
+    def _start_worker(options):
+        """
+        Set up a collection process, run once per process by the WorkerPool
+        :param options: the UserOptions of the PyDocumentor that started the process
+        """
+        PyDocumentor._worker = PyDocumentor(options=options)
+
+    @staticmethod
+    def _write_class(sink: FormatterSink, cls: dict, prefix: str):
+        """
+        Call the proper Formatter hooks through sink to write a class and everything in it
+        :param sink: the FormatterSink to write through
+        :param cls: the collected data of the class
+        :param prefix: the module's name
+        """
+        write = sink.write
+        write(sink.class_start(indent=1))
+        write(sink.class_title(cls['name'], prefix=prefix, indent=1))
+        if cls['bases']:
+            write(sink.class_bases(cls['bases'], indent=2))
+        write(sink.class_body_start(indent=1))
+        write(sink.class_doc(cls['doc'], indent=2))
+
+        if cls['constants']:
+            write(sink.class_constants_title(indent=2))
+            write(sink.class_constants_start(indent=2))
+            for const in cls['constants']:
+                write(sink.class_constant(const['name'], const['value'], prefix=cls['name'], indent=3))
+            write(sink.class_constants_end(indent=2))
+
+        if cls['static_methods']:
+            write(sink.static_function_title(indent=2))
+            PyDocumentor._write_functions(sink, cls['static_methods'], cls['name'], indent=3)
+
+        if cls['methods']:
+            write(sink.methods_title(indent=2))
+            PyDocumentor._write_functions(sink, cls['methods'], cls['name'], indent=3)
+
+        write(sink.class_body_end(indent=1))
+        write(sink.class_end(indent=1))
+        sink.flush()
+
+    @staticmethod
+    def _write_functions(sink: FormatterSink, funcs: list, prefix: str, indent: int):
+        """
+        Call the proper Formatter hooks through sink to write this block of functions
+        :param sink: the FormatterSink to write through
+        :param funcs: a list of the functions to format
+        :param prefix: the parent's name
+        :param indent: the indentation of this block of functions
+        """
+        write = sink.write
+        write(sink.function_block_start(indent=indent - 1))
+        for i, func in enumerate(funcs, 1):
+            write(sink.function_start(indent=indent))
+            write(sink.function_signature(func['name'], func['parameters'], func['return_annotation'], prefix=prefix,
+                                          indent=indent))
+            write(sink.function_body_start(indent=indent))
+            write(sink.function_doc(func['doc'], indent=indent + 1))
+            write(sink.function_parameters(func['parameters'], indent=indent + 1))
+
+            if func['return']:
+                write(sink.function_return_parameter(func['return'], indent=indent + 1))
+
+            write(sink.function_body_end(indent=indent))
+            write(sink.function_end(indent=indent))
+
+            if not i % 256:  # keep what is waiting to be written small for really long blocks
+                sink.flush()
+        write(sink.function_block_end(indent=indent - 1))
+
+    @staticmethod
+    def _write_symbols(sink: FormatterSink, mod: dict):
+        """
+        Call the Formatter hooks through sink to write just the functions and classes of a module, without the top of
+        the file, the module's title and doc, or the table of contents around them
+        :param sink: the FormatterSink to write through
+        :param mod: the collected data of the module, holding only the symbols to write
+        """
+        if mod['functions']:
+            PyDocumentor._write_functions(sink, mod['functions'], mod['name'], indent=2)
+
+        for cls in mod['classes']:
+            PyDocumentor._write_class(sink, cls, mod['name'])
+        sink.flush()
+
+    @staticmethod
+    def _user_input(prompt: str, error="", validator=None) -> str:
+        """
+        Get user input, if there is a validator given, then continue to collect input until the data is good
+        :param prompt: The prompt to output
+        :param error: The error to show if there is a validator and it fails
+        :param validator: A callable to use to make sure the data is in a valid format
+        :return: the valid input
+        """
+        while True:
+            result = input(prompt + ": ").strip()
+
+            if validator is None or (validator is not None and validator(result)):
+                return result
+            else:
+                print("<{}>".format(error), end="\n\n")
+
+    def __init__(self, path: str = None, options: UserOptions = None, pools: dict = None):
+        """
+        Without any arguments, ask for the options and the modules to document in the console, then collect them.
+        Otherwise nothing is asked for: with a path, the modules there are found and collected ready to export(), and
+        without one nothing is collected, which is how each collection process sets up its instance. Every instance
+        keeps its own options and state, so separate instances can build at the same time on different threads.
+        :param path: a Python file, a folder to document every module in, or a saved IR file to render again
+        :param options: the UserOptions to use, they are copied so changing them afterwards has no effect
+        :param pools: where to keep WorkerPools for the builds after this one to reuse, see build_all(). Whoever
+        passes it in closes the pools, and only one build at a time can use them.
+        """
+        self.options = UserOptions() if options is None else options.copy()
+        self._pools = pools
+        self._collected_data = {}
+        self._file_paths = []
+        self._manifest = {}
+        self._source_hashes = {}
+        self._unchanged_count = 0
+        self._to_collect = []
+        self._symbols = None
+        self._search = None
+        self._failed = {}  # file path: why it couldn't be collected
+        self._preloaded = None  # what the forkserver was told to import, once it has been
+
+        if path is None and options is None:
+            self.options.folder_mode = self._input_to_bool(
+                self._user_input("Collect all files in folder Y/N", "Choice must be yes or no",
+                                 lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.advanced_mode = self._input_to_bool(
+                self._user_input("Enter advanced mode Y/N", "Choice must be yes or no",
+                                 lambda x: x.lower() in ("yes", "no", "y", "n")))
+            print()
+
+            self._collect_file_names()
+            self._get_user_options()
+        elif path is not None:
+            if not path_exists(path):
+                raise FileNotFoundError("<{}> doesn't exist".format(path))
+            self.options.folder_mode = isdir(path)
+            self._use_path(path)
+            if not self.options.output_directory:
+                self.options.output_directory = self.options.directory
+
+        self._profiler = BuildProfiler(self.options.profile_slowest) if self.options.profile else None
+        if not self._file_paths:
+            return
+
+        if self._file_paths[0].endswith(self.IR_EXT):
+            # render-only run, everything was collected before so nothing gets imported
+            self._collected_data = self._load_ir(self._file_paths[0])
+            self._file_paths = list(self._collected_data)
+            self.options.incremental = False
+            self.options.save_collected = False
+            self.options.streaming = False
+            self.options.watch = False
+        else:
+            with self._measure("find changes"):
+                self._to_collect = self._find_modules_to_collect()
+            if not self.options.streaming:  # when streaming, each module is collected as it is exported
+                with self._measure("collect"):
+                    self._collect_modules()
+
+    def _build_search_index(self, dir_path: str) -> SearchIndex:
+        """
+        Start the SearchIndex for an export. Modules are added as they are formatted, for an incremental export the
+        modules that aren't collected this time are kept from the last export.
+        :param dir_path: the export directory
+        :return: the index
+        """
+        index = SearchIndex()
+        if self.options.incremental and self._manifest:
+            index.load(path_join(dir_path, self.SEARCH_FILE))
+            index.retain(self._file_paths)
+
+        for file_path in self._to_collect:
+            index.remove_module(file_path)
+
+        return index
+
+    def _build_symbol_index(self, dir_path: str, file_ext: str) -> SymbolIndex:
+        """
+        Build the SymbolIndex of everything collected. For an incremental export, modules that weren't collected this
+        time keep the symbols saved by the last export.
+        :param dir_path: the export directory
+        :param file_ext: The file extension that the data is formatted for
+        :return: the index
+        """
+        index = SymbolIndex()
+        if self.options.incremental and self._manifest:
+            index.load(path_join(dir_path, self.SYMBOLS_FILE))
+            index.retain(self._file_paths)
+
+        for file_path in self._to_collect:  # either collected again below, or excluded now
+            index.remove_module(file_path)
+        for file_path, data in self._collected_data.items():
+            index.add_module(file_path, data, self._output_name(file_path, file_ext))
+
+        return index
+
+    def _collect_class_info(self, cls, wanted: list = None) -> Optional[ClassInfo]:
+        """
+        Inspect a class and get its methods, constants, static_methods, doc and name. 
+        :param cls: The class to collect the data from
+        :param wanted: the patterns of the members to collect, see _select_members(), or None to collect all of them
+        :return: a ClassInfo of the collected data, or None if class is excluded
+        """
+        info = self._parse_docstring(cls.__doc__)
+        if not info.exclude:
+            data = ClassInfo(cls.__name__, cls.__doc__.strip() if cls.__doc__ is not None else "",
+                             # written the way they would be from inside the class's module
+                             [base.__qualname__ if base.__module__ in (cls.__module__, 'builtins')
+                              else "{}.{}".format(base.__module__, base.__qualname__)
+                              for base in cls.__bases__ if base is not object])
+            methods_functions, constants = self._scan_class(cls)
+
+            exclude_children = info.exclude_children
+            exclude_methods = info.exclude_methods
+            include_methods = info.include_methods
+
+            if wanted is not None:
+                constants = [item for item in constants if self._select_members(wanted, item[0]) is None]
+                methods_functions = [item for item in methods_functions
+                                     if self._select_members(wanted, item[0]) is None]
+
+            if not exclude_children:
+                data.constants = [ConstantInfo(name, memb) for name, memb in constants]
+
+            for name, memb, is_static in methods_functions:
+                if not self._is_method_excluded(name, include_methods, exclude_children, exclude_methods) and \
+                        (self.options.collect_private_methods or name[0] != "_" or name in include_methods):
+                    func = self._collect_function_info(memb)
+                    if func is not None:
+                        (data.static_methods if is_static else data.methods).append(func)
+
+            return data
+        else:
+            return None
+
+    def _collect_class_info_ast(self, node: ast.ClassDef, source: str, module_classes: dict,
+                                wanted: list = None) -> Optional[ClassInfo]:
+        """
+        Static counterpart of _collect_class_info(). Constants are also looked up through any base classes defined in
+        the same module, while methods only come from the class body, the same as when the class is inspected.
+        :param node: the ClassDef node of the class
+        :param source: the source of the module the class is in
+        :param module_classes: a dict of name -> ClassDef for the top-level classes of the module
+        :param wanted: the patterns of the members to collect, see _select_members(), or None to collect all of them
+        :return: a ClassInfo of the collected data, or None if the class is excluded
+        """
+        doc = ast.get_docstring(node, clean=False)
+        info = self._parse_docstring(doc)
+        if info.exclude:
+            return None
+
+        data = ClassInfo(node.name, doc.strip() if doc is not None else "",
+                         [self._source_text(source, base) for base in node.bases
+                          if not (isinstance(base, ast.Name) and base.id == 'object')])
+
+        exclude_children = info.exclude_children
+        exclude_methods = info.exclude_methods
+        include_methods = info.include_methods
+
+        # walk the class and its bases from this module, the closest definition of a name wins like attribute lookup
+        members = {}
+        chain, seen = [node], set()
+        while chain:
+            cls_node = chain.pop(0)
+            if cls_node.name in seen:
+                continue
+            seen.add(cls_node.name)
+
+            own = {}
+            for child in cls_node.body:
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    own[child.name] = child
+                elif isinstance(child, ast.Assign):
+                    for target in child.targets:
+                        if isinstance(target, ast.Name):
+                            own[target.id] = child.value
+                        elif isinstance(target, (ast.Tuple, ast.List)):
+                            # unpacking, only literal sequences of the right length can be lined up with the names
+                            values = child.value.elts if isinstance(child.value, (ast.Tuple, ast.List)) else []
+                            if len(values) != len(target.elts):
+                                values = [ast.Constant(value=LiteralText("..."))] * len(target.elts)
+                            for elt, value in zip(target.elts, values):
+                                if isinstance(elt, ast.Name):
+                                    own[elt.id] = value
+                elif isinstance(child, ast.AnnAssign) and isinstance(child.target, ast.Name) and child.value:
+                    own[child.target.id] = child.value
+
+            for name, memb in own.items():
+                if name not in members:
+                    members[name] = (cls_node is node, memb)
+
+            chain.extend(module_classes[base.id] for base in cls_node.bases
+                         if isinstance(base, ast.Name) and base.id in module_classes)
+
+        for name in sorted(members):
+            if wanted is not None and self._select_members(wanted, name) is not None:
+                continue
+            is_own, memb = members[name]
+            if isinstance(memb, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                decorators = {dec.id if isinstance(dec, ast.Name) else getattr(dec, 'attr', None)
+                              for dec in memb.decorator_list}
+                # properties aren't functions once the class is built, and only own methods are collected
+                if not is_own or decorators & {'property', 'setter', 'getter', 'deleter'}:
+                    continue
+                if self._is_method_excluded(name, include_methods, exclude_children, exclude_methods):
+                    continue
+                if not (self.options.collect_private_methods or name[0] != "_" or name in include_methods):
+                    continue
+
+                if 'staticmethod' in decorators:
+                    func = self._collect_function_info_ast(memb, source)
+                    if func is not None:
+                        data.static_methods.append(func)
+                else:
+                    func = self._collect_function_info_ast(memb, source, bound='classmethod' in decorators)
+                    if func is not None:
+                        data.methods.append(func)
+            elif not isinstance(memb, ast.ClassDef) and name[0] != "_" and not exclude_children:  # constants
+                data.constants.append(ConstantInfo(name, self._literal_value(source, memb)))
+
+        return data
+
+    def _collect_failed(self, file_path: str, reason: str):
+        """
+        Report a module that couldn't be imported, parsed or collected, the rest of the build carries on without it
+        :param file_path: the path of the module
+        :param reason: what went wrong
+        """
+        self._failed[file_path] = reason
+        print("<Couldn't collect <{}>: {}>".format(file_path, reason))
+
+    def _collect_file_names(self):
+        """
+        Collect all the file names for the modules that will have documentation created. If in folder_mode, then
+        walk through the folder and all of its child folders recursively, collecting all Python files.
+        """
+        if self.options.folder_mode:
+            folder_path = self._user_input("Folder Path", "Invalid folder path", isdir)
+
+            if self.options.advanced_mode:
+                self.options.include_patterns = self._split_patterns(
+                    self._user_input("Only collect files matching (comma separated globs, leave blank for all)"))
+                self.options.exclude_patterns = self._split_patterns(
+                    self._user_input("Skip files and folders matching (comma separated globs, leave blank for none)"))
+                self.options.use_gitignore = self._input_to_bool(
+                    self._user_input("Skip what .gitignore files ignore Y/N",
+                                     "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+                self.options.discovery_threads = int(
+                    self._user_input("Threads to search folders with (0 to use every core)",
+                                     "Value must be a number", lambda x: x.isdigit()))
+            self._use_path(folder_path)
+        else:
+            self._use_path(self._user_input("File Path (or a {} file to render saved data)".format(self.IR_EXT),
+                                            "Invalid file path", isfile))
+
+    def _collect_function_info(self, func: callable) -> Optional[FunctionInfo]:
+        """
+        Inspect and collect the data from a function. Get its name, documentation, and parameters.
+        :param func: The function to inspect and collect data on
+        :return: a FunctionInfo of the collected data, or None if the function is excluded
+        """
+        docs = self._parse_docstring(func.__doc__)
+        data = None
+        if not docs.exclude:
+            annotations = getfullargspec(func).annotations
+            sig = signature(func)
+            if self._profiler is not None:
+                self._profiler.count("signature() calls")
+
+            parameters = []
+            for param in sig.parameters.values():
+                parameters.append(ParamInfo(param.name, param.kind, param.default, docs.params.get(param.name),
+                                            annotations[param.name].__name__ if param.name in annotations else None))
+
+            data = FunctionInfo(func.__name__, docs.summary, parameters, docs.returns,
+                                annotations['return'].__name__ if 'return' in annotations else None)
+
+        return data
+
+    def _collect_function_info_ast(self, node, source: str, bound=False) -> Optional[FunctionInfo]:
+        """
+        Static counterpart of _collect_function_info(). Defaults that are literals are evaluated, other defaults and
+        all annotations are kept as their source text.
+        :param node: the FunctionDef or AsyncFunctionDef node of the function
+        :param source: the source of the module the function is in
+        :param bound: whether the first parameter is bound, like with classmethods, and should be left off
+        :return: a FunctionInfo of the collected data, or None if the function is excluded
+        """
+        docs = self._parse_docstring(ast.get_docstring(node, clean=False))
+        if docs.exclude:
+            return None
+
+        # line up every argument with its kind and default, the same order signature() gives
+        args = node.args
+        positional = ([(arg, Parameter.POSITIONAL_ONLY) for arg in args.posonlyargs] +
+                      [(arg, Parameter.POSITIONAL_OR_KEYWORD) for arg in args.args])
+        defaults = [None] * (len(positional) - len(args.defaults)) + list(args.defaults)
+        params = [(arg, kind, default) for (arg, kind), default in zip(positional, defaults)]
+
+        if bound and params:
+            del params[0]
+        if args.vararg is not None:
+            params.append((args.vararg, Parameter.VAR_POSITIONAL, None))
+        params.extend((arg, Parameter.KEYWORD_ONLY, default) for arg, default in zip(args.kwonlyargs, args.kw_defaults))
+        if args.kwarg is not None:
+            params.append((args.kwarg, Parameter.VAR_KEYWORD, None))
+
+        parameters = []
+        for arg, kind, default in params:
+            default = self._literal_value(source, default) if default is not None else ParamInfo.EMPTY
+            annotation = self._source_text(source, arg.annotation) if arg.annotation is not None else None
+            parameters.append(ParamInfo(arg.arg, kind, default, docs.params.get(arg.arg), annotation))
+
+        return FunctionInfo(node.name, docs.summary, parameters, docs.returns,
+                            self._source_text(source, node.returns) if node.returns is not None else None)
+
+    def _collect_module_info(self, mod, wanted: list = None) -> Optional[ModuleInfo]:
+        """
+        Inspect and collect data from the module given. Collect information from all of its classes and functions as
+        well.
+        :param mod: the module to inspect and collect data from 
+        :param wanted: the patterns of the members to collect, see _select_members(), or None to collect all of them.
+        The doc of the module is only kept when all of it is collected.
+        :return: a ModuleInfo of the collected data, or None if the module is excluded
+        """
+        inspected = getmembers(mod)
+        if not self._parse_docstring(mod.__doc__).exclude:
+            data = ModuleInfo(mod.__name__, mod.__doc__.strip() if mod.__doc__ and wanted is None else "")
+
+            for name, memb in inspected:
+                inner = None
+                if wanted is not None:
+                    inner = self._select_members(wanted, name)
+                    if inner is not None and (not inner or not isclass(memb)):
+                        continue
+
+                if isclass(memb) and memb.__module__ == mod.__name__:
+                    cls = self._collect_class_info(memb, inner)
+                    if cls is not None:
+                        data.classes.append(cls)
+                # if this is a function, make sure it wasn't imported, and that it isn't private
+                elif isfunction(memb) and memb.__module__ == mod.__name__:
+                    if self.options.collect_private_methods or name[0] != "_":
+                        func = self._collect_function_info(memb)
+                        if func is not None:
+                            data.functions.append(func)
+
+            return data
+        return None
+
+    def _collect_module_info_ast(self, name: str, source: str, tree: ast.Module,
+                                 wanted: list = None) -> Optional[ModuleInfo]:
+        """
+        Static counterpart of _collect_module_info(). Collect the top-level classes and functions from the parsed
+        source of a module without importing it.
+        :param name: the name of the module
+        :param source: the source of the module
+        :param tree: the parsed source of the module
+        :param wanted: the patterns of the members to collect, see _select_members(), or None to collect all of them
+        :return: a ModuleInfo of the collected data, or None if the module is excluded
+        """
+        doc = ast.get_docstring(tree, clean=False)
+        if self._parse_docstring(doc).exclude:
+            return None
+
+        data = ModuleInfo(name, doc.strip() if doc and wanted is None else "")
+
+        # later definitions replace earlier ones, just like they would when the module is run
+        members = {}
+        for node in tree.body:
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                members[node.name] = node
+        module_classes = {memb_name: memb for memb_name, memb in members.items() if isinstance(memb, ast.ClassDef)}
+
+        for memb_name in sorted(members):
+            memb = members[memb_name]
+            inner = None
+            if wanted is not None:
+                inner = self._select_members(wanted, memb_name)
+                if inner is not None and (not inner or not isinstance(memb, ast.ClassDef)):
+                    continue
+
+            if isinstance(memb, ast.ClassDef):
+                cls = self._collect_class_info_ast(memb, source, module_classes, inner)
+                if cls is not None:
+                    data.classes.append(cls)
+            elif self.options.collect_private_methods or memb_name[0] != "_":
+                func = self._collect_function_info_ast(memb, source)
+                if func is not None:
+                    data.functions.append(func)
+
+        return data
+
+    def _collect_modules(self):
+        """
+        Collect the data of every module found by _find_modules_to_collect() into _collected_data
+        """
+        for file_path, data in self._iter_collected(self._to_collect):
+            if data is not None:
+                self._collected_data[file_path] = data
+
+    def _collect_path(self, file_path: str, wanted: list = None) -> Optional[dict]:
+        """
+        Import or parse, depending on static_collection, a single module and collect its data
+        :param file_path: the path of the module
+        :param wanted: the patterns of the members to collect, see _select_members(), or None to collect all of them
+        :return: the collected data of the module, or None if the module is excluded
+        """
+        if self._profiler is None:
+            if self.options.static_collection:
+                _, name, source, tree = self._parse_module(file_path)
+                return self._collect_module_info_ast(name, source, tree, wanted)
+            return self._collect_module_info(self._import_module(file_path), wanted)
+
+        scans = self._parse_docstring.cache_info().misses
+        with self._measure("import", file_path):
+            if self.options.static_collection:
+                _, name, source, tree = self._parse_module(file_path)
+            else:
+                mod = self._import_module(file_path)
+        with self._measure("collect", file_path):
+            if self.options.static_collection:
+                data = self._collect_module_info_ast(name, source, tree, wanted)
+            else:
+                data = self._collect_module_info(mod, wanted)
+
+        self._profiler.count("docstring regex scans", self._parse_docstring.cache_info().misses - scans)
+        return data
+
+    def _create_finder(self, folder_path: str) -> ModuleFinder:
+        """
+        Create a ModuleFinder for folder_path with the discovery options
+        :param folder_path: the folder to search
+        :return: the ModuleFinder
+        """
+        threads = self.options.discovery_threads if self.options.discovery_threads > 0 else cpu_count() or 1
+        return ModuleFinder(folder_path, self.options.include_patterns, self.options.exclude_patterns,
+                            self.options.use_gitignore, threads)
+
+    def _create_formatter(self) -> Formatter:
+        """
+        Create the Formatter for the chosen output format
+        :return: the Formatter to export with
+        """
+        if self.options.output_format == self.HTML:
+            return HtmlFormatter(self.options)
+        elif self.options.output_format == self.MARK_DOWN:
+            return MarkdownFormatter(self.options)
+
+    def _export_directory(self) -> str:
+        """
+        Get the folder everything is exported to, inside of the output directory
+        :return: the path of the export folder
+        """
+        return self.options.output_directory + sep + self.options.output_folder_name
+
+    def _export_streaming(self, dir_path: str, ft: Formatter, ir_file, writer: OutputWriter) -> set:
+        """
+        Collect, format and write each module before moving onto the next, so only a few modules are ever held in
+        memory. If pipeline_queue_size is set, formatting and writing each get their own thread, fed by bounded queues,
+        so they overlap with collecting the next modules.
+        :param dir_path: the export directory
+        :param ft: the Formatter to use to format the data
+        :param ir_file: the open IR file from _open_ir() to add each module to, or None
+        :param writer: the OutputWriter to write each module with
+        :return: a set of the file paths of the modules that were exported
+        """
+        exported = set()
+
+        def format_module(item):
+            file_path, data = item
+            if self._search is not None:
+                self._search.add_module(file_path, data, self._output_name(file_path, ft.FILE_EXT))
+            with self._measure("render", file_path):
+                return file_path, self._format_module(ft, data, file_path)
+
+        def write_module(item):
+            file_path, formatted = item
+            writer.submit(path_join(dir_path, self._output_name(file_path, ft.FILE_EXT)), formatted,
+                          self._measure("write", file_path))
+            exported.add(file_path)
+
+        queues, threads, errors = [], [], []
+        if self.options.pipeline_queue_size > 0:
+            queues = [Queue(self.options.pipeline_queue_size), Queue(self.options.pipeline_queue_size)]
+            threads = [Thread(target=self._pipeline_stage, args=(format_module, queues[0], queues[1], errors)),
+                       Thread(target=self._pipeline_stage, args=(write_module, queues[1], None, errors))]
+            for thread in threads:
+                thread.start()
+
+        try:
+            for file_path, data in self._iter_collected(self._to_collect):
+                if data is None:
+                    continue
+                if ir_file is not None:
+                    ir_file.write(self._encode_ir(file_path, data) + "\n")
+                # only what has been collected so far, and what an incremental export kept, can be linked to
+                if self._symbols is not None:
+                    self._symbols.add_module(file_path, data, self._output_name(file_path, ft.FILE_EXT))
+
+                if queues:
+                    queues[0].put((file_path, data))
+                else:
+                    write_module(format_module((file_path, data)))
+        finally:
+            if queues:
+                queues[0].put(None)
+                for thread in threads:
+                    thread.join()
+
+        if errors:
+            raise errors[0]
+        return exported
+
+    def _find_modules_to_collect(self) -> list:
+        """
+        Find the modules in _file_paths that need to be collected. For an incremental export, modules that haven't
+        changed since the last export are left out entirely.
+        :return: a list of the file paths of the modules to collect
+        """
+        to_collect = self._file_paths
+        if self.options.incremental:
+            self._manifest = self._load_manifest()
+            self._source_hashes = {file_path: self._file_hash(file_path) for file_path in self._file_paths}
+            to_collect = [file_path for file_path in self._file_paths if not self._is_unchanged(file_path)]
+        self._unchanged_count = len(self._file_paths) - len(to_collect)
+
+        return to_collect
+
+    def _find_preload_modules(self, file_paths: list) -> list:
+        """
+        Find the third-party packages that at least PRELOAD_SHARED_BY of the modules import, by scanning their source
+        for import statements rather than parsing it. The standard library, the modules being documented and anything
+        that can't be found are left out.
+        :param file_paths: the paths of the modules that are going to be collected
+        :return: the names of the packages, the most shared first
+        """
+        local = {path_split(file_path)[1].rsplit(".", 1)[0] for file_path in self._file_paths}
+        if self.options.folder_mode:
+            local.add(path_split(self.options.directory.rstrip(sep))[1])
+            local.update(entry.name for entry in scandir(self.options.directory) if entry.is_dir())
+
+        counts = {}
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as file:
+                    source = file.read()
+            except OSError:
+                continue
+
+            names = set()
+            for from_name, import_names in self._IMPORTS.findall(source):
+                if from_name:
+                    names.add(from_name)
+                else:
+                    names.update(name.split()[0].split(".")[0] for name in import_names.split(",") if name.strip())
+            for name in names:
+                counts[name] = counts.get(name, 0) + 1
+
+        found = []
+        for name, count in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+            if count < self.PRELOAD_SHARED_BY or name in sys.stdlib_module_names or name in local:
+                continue
+            try:
+                if importlib.util.find_spec(name) is not None:
+                    found.append(name)
+            except (ImportError, ValueError):
+                pass
+
+        return found
+
+    def _find_python_files(self, folder_path: str) -> list:
+        """
+        Search folder_path and all of its sub-directories, collecting every Python file that isn't excluded
+        :param folder_path: the folder to look through
+        :return: a list of the file paths of the Python files found
+        """
+        return self._create_finder(folder_path).find()
+
+    def _find_symbol_modules(self, path: str, names: list) -> tuple:
+        """
+        Find the modules the symbols asked for by render_symbols() are in. In a folder, names are dotted the way they
+        would be imported from it, optionally led by the name of the folder itself. The file a name leads to is looked
+        for directly, only when a pattern is in the part of the name before any module is found are the modules in the
+        folder searched for.
+        :param path: a Python file, or the folder the names start from
+        :param names: the qualified names and glob patterns asked for
+        :return: ({file path: [the rest of each name in the module, split into a tuple of patterns]}, [the names that
+        don't lead to any module])
+        """
+        found, missing = {}, []
+        if not isdir(path):
+            mod_name = path_split(path)[1].split('.')[0]
+            for name in names:
+                parts = tuple(name.split("."))
+                # the name of the module is optional, anything else has to be in the module
+                found.setdefault(path, []).append(parts[1:] if fnmatchcase(mod_name, parts[0]) else parts)
+            return found, missing
+
+        folder_name = path_split(path.rstrip(sep))[1]
+        modules = None  # (file path, module name split at its dots) for every module, only found if a pattern needs it
+        for name in names:
+            parts = tuple(name.split("."))
+            # (the parts after the folder, the fewest of them that make up a module), where none is the folder itself
+            attempts = [(parts, 1)] + ([(parts[1:], 0)] if parts[0] == folder_name else [])
+            matches = []
+            for parts, fewest in attempts:
+                plain = next((i for i, part in enumerate(parts) if any(c in part for c in "*?[")), len(parts))
+                for i in range(plain, fewest - 1, -1):
+                    base = path_join(path, *parts[:i])
+                    file_path = base + ".py" if i and isfile(base + ".py") else path_join(base, "__init__.py")
+                    if isfile(file_path):
+                        matches.append((file_path, parts[i:]))
+                        break
+                else:
+                    if plain < len(parts):
+                        if modules is None:
+                            modules = []
+                            for file_path in self._find_python_files(path):
+                                mod_parts = tuple(relpath(file_path, path)[:-len(".py")].split(sep))
+                                if mod_parts[-1] == "__init__":
+                                    mod_parts = mod_parts[:-1]
+                                modules.append((file_path, mod_parts))
+
+                        matches.extend((file_path, parts[len(mod_parts):]) for file_path, mod_parts in modules
+                                       if fewest <= len(mod_parts) <= len(parts) and
+                                       all(fnmatchcase(*pair) for pair in zip(mod_parts, parts)))
+                if matches:
+                    break
+
+            if not matches:
+                missing.append(name)
+            for file_path, rest in matches:
+                found.setdefault(file_path, []).append(rest)
+
+        return found, missing
+
+    def _format_module(self, ft: Formatter, mod: dict, file_path: str = None, symbols_only=False) -> str:
+        """
+        Format the collected data of a whole module
+        :param ft: the Formatter to use to format the data
+        :param mod: the collected data of the module
+        :param file_path: the path of the module, so the symbol index can remember what its links were looked up as
+        :param symbols_only: format just the functions and classes, leaving out the rest of the page around them
+        :return: the formatted module
+        """
+        ft.free_run()
+        # the Formatter looks the same few keys up over and over, which plain dicts are far quicker at, and linking can
+        # fill in a copy without touching the collected data
+        mod = (mod if isinstance(mod, CollectedInfo) else ModuleInfo.from_dict(mod)).to_dict()
+        if self._symbols is not None:
+            self._link_module(ft, mod, file_path)
+
+        stream = StringIO()
+        sink = ft.create_sink(stream)
+
+        # the compiled plan calls the hooks directly, so it only stands in for the default sink
+        plan = RenderPlan.for_formatter(type(ft)) if type(ft).create_sink is Formatter.create_sink else None
+        if symbols_only:
+            self._write_symbols(sink, mod)
+        elif plan is not None:
+            plan.module(ft, sink.write, sink.flush, mod, self.options.table_of_contents)
+        else:
+            self._write_module(sink, mod)
+
+        return stream.getvalue()
+
+    def _get_user_options(self):
+        """
+        Collect options from the user that allows them to customize the output 
+        """
+        # output directory
         out_d = self._user_input("Output Directory (leave blank to export where modules are)", "Invalid directory",
                                  isdir)
         self.options.output_directory = out_d if out_d != "" else self.options.directory
@@ -1229,6 +4196,49 @@ class PyDocumentor:
             self.options.collect_private_methods = self._input_to_bool(
                 self._user_input("Collect methods prefixed with '_' Y/N",
                                  "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.static_collection = self._input_to_bool(
+                self._user_input("Collect from source without importing modules Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.processes = int(self._user_input("Processes to collect with (0 to use every core)",
+                                                          "Value must be a number", lambda x: x.isdigit()))
+            self.options.module_timeout = float(
+                self._user_input("Seconds each module may take to collect (0 for no limit)", "Value must be a number",
+                                 lambda x: x.replace(".", "", 1).isdigit()))
+            self.options.module_memory_limit = int(
+                self._user_input("MB of memory each collection process may use (0 for no limit)",
+                                 "Value must be a number", lambda x: x.isdigit()))
+            self.options.forkserver = self._input_to_bool(
+                self._user_input("Start collection processes from a forkserver with dependencies preloaded Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            if self.options.forkserver:
+                self.options.preload_modules = self._split_patterns(
+                    self._user_input("Modules to preload (comma separated, leave blank to find them)"))
+            self.options.incremental = self._input_to_bool(
+                self._user_input("Only rebuild modules that changed since the last export Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.save_collected = self._input_to_bool(
+                self._user_input("Save collected data for render-only runs Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.streaming = self._input_to_bool(
+                self._user_input("Export one module at a time to keep memory use low Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            if self.options.streaming:
+                self.options.pipeline_queue_size = int(
+                    self._user_input("Modules to queue between collecting, formatting and writing (0 to not overlap)",
+                                     "Value must be a number", lambda x: x.isdigit()))
+            self.options.watch = self._input_to_bool(
+                self._user_input("Keep watching for changes after exporting Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.link_symbols = self._input_to_bool(
+                self._user_input("Link names to where they are documented Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            self.options.profile = self._input_to_bool(
+                self._user_input("Profile the time and memory of each phase and module Y/N",
+                                 "Choice must be yes or no", lambda x: x.lower() in ("yes", "no", "y", "n")))
+            if self.options.profile:
+                self.options.profile_slowest = int(
+                    self._user_input("Slowest modules to save cProfile stats for (0 for none)",
+                                     "Value must be a number", lambda x: x.isdigit()))
 
             # format dependent
             if self.options.output_format == self.HTML:
@@ -1236,6 +4246,28 @@ class PyDocumentor:
                                                                                          "Choice must be yes or no",
                                                                                          lambda x: x.lower() in (
                                                                                                "yes", "no", "y", "n")))
+                self.options.minify_css = self._input_to_bool(self._user_input("Minify CSS Y/N",
+                                                                               "Choice must be yes or no",
+                                                                               lambda x: x.lower() in (
+                                                                                   "yes", "no", "y", "n")))
+                self.options.search_index = self._input_to_bool(self._user_input("Add a search page Y/N",
+                                                                                 "Choice must be yes or no",
+                                                                                 lambda x: x.lower() in (
+                                                                                     "yes", "no", "y", "n")))
+
+    def _import_module(self, file_path: str):
+        """
+        Import the module at file_path so that the information can be collected on it
+        :param file_path: the path of the module
+        :return: the imported module
+        """
+        _, file_name = path_split(file_path)
+        file_name = file_name.split('.')[0]
+
+        module_spec = importlib.util.spec_from_file_location(file_name, file_path)
+        mod = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(mod)
+        return mod
 
     def _import_modules(self) -> list:
         """
@@ -1243,28 +4275,533 @@ class PyDocumentor:
         collected on the modules
         :return: A list of all the imported modules
         """
-        modules = []
+        return [self._import_module(file_path) for file_path in self._file_paths]
 
-        for file_path in self._file_paths:
+    def _is_unchanged(self, file_path: str) -> bool:
+        """
+        Check the manifest from the last export to see if this module can keep its existing exported file
+        :param file_path: the path of the module
+        :return: whether the module's source is the same as when it was last exported and its output is still there
+        """
+        entry = self._manifest.get('modules', {}).get(file_path)
+        if entry is None or entry['hash'] != self._source_hashes[file_path]:
+            return False
+
+        return entry['output'] is None or isfile(path_join(self._export_directory(), entry['output']))
+
+    def _iter_collected(self, file_paths: list = None):
+        """
+        Collect every module in file_paths, either one after the other or spread across a WorkerPool when the processes
+        option allows more than one, or when a module_timeout or module_memory_limit is set. Either way, results come
+        back in the same order as file_paths and only a few modules are ever in flight at once. A module that can't be
+        collected is reported and left out, without stopping the rest. When the instance was given pools, the
+        WorkerPool is taken from there and left running for the next build.
+        :param file_paths: the paths of the modules to collect, defaults to _file_paths
+        :return: a generator of (file_path, data), where data is None if the module is excluded or couldn't be collected
+        """
+        file_paths = self._file_paths if file_paths is None else file_paths
+        processes = self.options.processes if self.options.processes > 0 else cpu_count() or 1
+        sandboxed = self.options.module_timeout > 0 or self.options.module_memory_limit > 0
+        if not sandboxed and (processes == 1 or len(file_paths) < 2):
+            for file_path in file_paths:
+                try:
+                    data = self._collect_path(file_path)
+                except Exception as error:
+                    self._collect_failed(file_path, "{}: {}".format(type(error).__name__, error))
+                    data = None
+                except SystemExit as error:  # the module tried to quit
+                    self._collect_failed(file_path, "SystemExit: {}".format(error))
+                    data = None
+                else:
+                    self._failed.pop(file_path, None)
+                yield file_path, data
+            return
+
+        # builds sharing pools only share the ones started the same way
+        key = (processes, self.options.module_timeout, self.options.module_memory_limit, self.options.forkserver)
+        pool = self._pools.get(key) if self._pools is not None else None
+        if pool is None:
+            pool = WorkerPool(processes, self._collect_in_worker, self._start_worker, (self.options,),
+                              self.options.module_timeout, self.options.module_memory_limit,
+                              self._worker_context(file_paths))
+            if self._pools is not None:
+                self._pools[key] = pool
+
+        try:
+            for (file_path, _), ok, result in pool.map((file_path, self.options) for file_path in file_paths):
+                if not ok:
+                    self._collect_failed(file_path, result)
+                    yield file_path, None
+                    continue
+
+                _, data, recorded = result
+                if recorded is not None:
+                    self._profiler.merge(file_path, recorded)
+                self._failed.pop(file_path, None)
+                yield file_path, data
+        finally:
+            if self._pools is None:
+                pool.close()
+
+    def _link_module(self, ft: Formatter, mod: dict, file_path: str = None):
+        """
+        Turn annotations, base classes and `names` in docstrings into links by ft, wherever the symbol index knows where
+        they are documented. The data is changed in place, so it should be a copy from to_dict().
+        :param ft: the Formatter to create the links with
+        :param mod: the data of the module as plain dicts
+        :param file_path: the path of the module, if given the index remembers what each name resolved to
+        """
+        context, lookups = mod['name'], {}
+
+        def resolve(name, in_module):
+            if name not in lookups:
+                if self._profiler is not None:
+                    self._profiler.count("symbol lookups")
+                lookups[name] = self._symbols.resolve(name, in_module)
+            return lookups[name]
+
+        def link_name(match):
+            name = match.group(0)
+            target = None if hasattr(builtins, name) else resolve(name, context)
+            return name if target is None else ft.link(name, target)
+
+        def link_code(match):
+            target = resolve(match.group(1), context)
+            return match.group(0) if target is None else ft.link(match.group(1), target, code=True)
+
+        def link_doc(doc):
+            return self._BACKTICKED.sub(link_code, doc) if doc and '`' in doc else doc
+
+        def link_functions(funcs):
+            for func in funcs:
+                for param in func['parameters']:
+                    if 'annotation' in param:
+                        param['annotation'] = self._IDENTIFIER.sub(link_name, str(param['annotation']))
+                    if 'doc' in param:
+                        param['doc'] = link_doc(param['doc'])
+
+                func['doc'] = link_doc(func['doc'])
+                func['return'] = link_doc(func['return'])
+                if func['return_annotation'] is not None:
+                    func['return_annotation'] = self._IDENTIFIER.sub(link_name, str(func['return_annotation']))
+
+        for cls in mod['classes']:
+            cls['doc'] = link_doc(cls['doc'])
+            cls['bases'] = [self._IDENTIFIER.sub(link_name, base) for base in cls['bases']]
+            link_functions(cls['static_methods'])
+            link_functions(cls['methods'])
+
+        mod['doc'] = link_doc(mod['doc'])
+        link_functions(mod['functions'])
+        if file_path is not None:
+            self._symbols.remember(file_path, context, lookups)
+
+    def _load_manifest(self) -> dict:
+        """
+        Load the manifest left in the export folder by the last incremental export. A manifest written by another
+        version or with different options is ignored, so everything gets rebuilt.
+        :return: the manifest, or an empty dict if there isn't a usable one
+        """
+        manifest_path = path_join(self._export_directory(), self.MANIFEST_FILE)
+        try:
+            with open(manifest_path, 'r') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+        if manifest.get('version') != __version__ or manifest.get('options') != self._option_fingerprint():
+            return {}
+        return manifest
+
+    def _measure(self, stage: str, file_path: str = None):
+        """
+        Measure a phase of the build, or a stage of a single module, with the BuildProfiler when profiling
+        :param stage: the name of the phase, or one of BuildProfiler.MODULE_STAGES
+        :param file_path: the path of the module, or None for a phase of the whole build
+        :return: a context manager to use as a with statement, which does nothing when not profiling
+        """
+        if self._profiler is None:
+            return nullcontext()
+        return self._profiler.phase(stage) if file_path is None else self._profiler.module(file_path, stage)
+
+    def _option_fingerprint(self) -> dict:
+        """
+        Collect the options that change what gets exported, an export is only reused if these all match
+        :return: a dict of option name -> value
+        """
+        names = ('output_format', 'table_of_contents', 'add_css_to_each_file', 'minify_css', 'collect_private_methods',
+                 'static_collection', 'link_symbols', 'search_index')
+        fingerprint = {name: getattr(self.options, name) for name in names}
+        if self.options.output_format == self.HTML:  # a changed stylesheet changes every module
+            fingerprint['stylesheet'] = HtmlFormatter.load_stylesheet(HtmlFormatter.STYLESHEET,
+                                                                      self.options.minify_css)[1]
+        return fingerprint
+
+    @contextmanager
+    def _open_ir(self, ir_path: str):
+        """
+        Start an IR file that a render-only run can load instead of importing everything again. The first line is a
+        header, then each module is a line of JSON from _encode_ir(). For an incremental export, the unchanged modules
+        are carried over from the last IR file, the caller adds the rest. The IR file is only replaced once the block
+        finishes without an error, and not at all when nothing in it changed.
+        :param ir_path: the path of the IR file
+        :return: the IR file, open for writing
+        """
+        carried = []
+        if self._unchanged_count and isfile(ir_path):
+            keep = set(self._file_paths).difference(self._to_collect)
+            with open(ir_path, 'r', encoding='utf-8') as file:
+                file.readline()
+                for line in file:
+                    file_path = json.loads(line)[0]
+                    if file_path in keep:
+                        carried.append(line)
+
+        with OutputWriter.replacing(ir_path) as ir_file:
+            ir_file.write(json.dumps({'pydocumentor': __version__}) + "\n")
+            ir_file.writelines(carried)
+            yield ir_file
+
+    def _parse_module(self, file_path: str) -> tuple:
+        """
+        Static counterpart of _import_module(). Read and parse the module at file_path without running any of its code
+        :param file_path: the path of the module
+        :return: (file_path, module_name, source, tree)
+        """
+        _, file_name = path_split(file_path)
+        file_name = file_name.split('.')[0]
+
+        with open(file_path, 'rb') as file:
+            source = importlib.util.decode_source(file.read())
+        return file_path, file_name, source, ast.parse(source, file_path)
+
+    def _parse_modules(self) -> list:
+        """
+        Static counterpart of _import_modules(). Go through all the file paths collected earlier and parse them, without
+        running any of their code
+        :return: A list of (file_path, module_name, source, tree) for every module
+        """
+        return [self._parse_module(file_path) for file_path in self._file_paths]
+
+    def _rebuild(self, dir_path: str, ft: Formatter, changed: list, removed: list):
+        """
+        Collect and export just the modules that changed since the last build, everything else in _collected_data and
+        the export directory is left alone. _file_paths needs to already hold the modules that exist now.
+        :param dir_path: the export directory
+        :param ft: the Formatter to use to format the data
+        :param changed: the file paths of the modules that were added or changed
+        :param removed: the file paths of the modules that no longer exist
+        """
+        for file_path in removed:
+            self._collected_data.pop(file_path, None)
+            self._source_hashes.pop(file_path, None)
+        if self.options.incremental or self.options.save_collected:
+            for file_path in changed:
+                self._source_hashes[file_path] = self._file_hash(file_path)
+
+        self._to_collect = changed
+        self._unchanged_count = len(self._file_paths) - len(changed)
+        collected, dropped = [], set(removed)
+        with self._open_ir(path_join(dir_path, self.IR_FILE)) if self.options.save_collected else nullcontext() \
+                as ir_file:
+            for file_path, data in self._iter_collected(changed):
+                if data is None:
+                    self._collected_data.pop(file_path, None)
+                    dropped.add(file_path)
+                    continue
+
+                if ir_file is not None:
+                    ir_file.write(self._encode_ir(file_path, data) + "\n")
+                collected.append((file_path, data))
+
+        # index everything that changed before formatting, so the changed modules can link to each other
+        for index in (self._symbols, self._search):
+            if index is not None:
+                for file_path in dropped:
+                    index.remove_module(file_path)
+        if self._symbols is not None:
+            for file_path, data in collected:
+                self._symbols.add_module(file_path, data, self._output_name(file_path, ft.FILE_EXT))
+
+        with OutputWriter() as writer:
+            for file_path, data in collected:
+                if not self.options.streaming:
+                    self._collected_data[file_path] = data
+                with self._measure("render", file_path):
+                    formatted = self._format_module(ft, data, file_path)
+                writer.submit(path_join(dir_path, self._output_name(file_path, ft.FILE_EXT)), formatted,
+                              self._measure("write", file_path))
+                if self._search is not None:
+                    self._search.add_module(file_path, data, self._output_name(file_path, ft.FILE_EXT))
+            if self._symbols is not None:
+                self._relink(dir_path, ft, writer, {file_path for file_path, _ in collected})
+        self._write_indexes(dir_path)
+
+        if self.options.incremental:
+            self._write_manifest(dir_path, {file_path for file_path, _ in collected}, ft.FILE_EXT)
+        else:
+            # the manifest cleans up after itself, otherwise remove the files of modules that don't export any more
+            outputs = {self._output_name(file_path, ft.FILE_EXT) for file_path in self._file_paths
+                       if file_path not in dropped}
+            for file_path in dropped:
+                output_path = path_join(dir_path, self._output_name(file_path, ft.FILE_EXT))
+                if self._output_name(file_path, ft.FILE_EXT) not in outputs and isfile(output_path):
+                    remove(output_path)
+
+    def _relink(self, dir_path: str, ft: Formatter, writer: OutputWriter, done: set):
+        """
+        Format again the modules that weren't formatted this time, but whose links the symbols that changed have made
+        stale. A module that isn't in _collected_data is collected again for it.
+        :param dir_path: the export directory
+        :param ft: the Formatter to use to format the data
+        :param writer: the OutputWriter to write each module with
+        :param done: the file paths of the modules that were just formatted
+        """
+        def relink(file_path, data):
+            with self._measure("render", file_path):
+                formatted = self._format_module(ft, data, file_path)
+            writer.submit(path_join(dir_path, self._output_name(file_path, ft.FILE_EXT)), formatted,
+                          self._measure("write", file_path))
+
+        to_collect = []
+        for file_path in self._symbols.stale(done):
+            if file_path in self._collected_data:
+                relink(file_path, self._collected_data[file_path])
+            else:
+                to_collect.append(file_path)
+
+        if to_collect:
+            for file_path, data in self._iter_collected(to_collect):
+                if data is not None:
+                    relink(file_path, data)
+
+    def _save_profile(self, dir_path: str):
+        """
+        Save what the BuildProfiler recorded as JSON, along with the cProfile stats of the slowest modules, into the
+        PROFILE_FOLDER of the export directory
+        :param dir_path: the export directory
+        """
+        folder = path_join(dir_path, self.PROFILE_FOLDER)
+        if not isdir(folder):
+            mkdir(folder)
+
+        recorded = self._profiler.to_json()
+        recorded['cprofile'] = self._profiler.dump_slowest(folder)
+        OutputWriter.replace_if_changed(path_join(folder, "profile.json"), json.dumps(recorded, indent=2))
+
+    def _scan_class(self, cls) -> tuple:
+        """
+        Sort the members of a class into the functions defined in its body and its public constants. The scan doesn't
+        depend on any of the class's directives, which are applied to what it finds afterwards.
+        :param cls: the class to scan
+        :return: ([(name, function, is_static)], [(name, value)]), both sorted by name
+        """
+        methods_functions = []
+        constants = []
+        method_dict = cls.__dict__
+
+        if self._profiler is not None:
+            self._profiler.count("getmembers() calls")
+        for name, memb in getmembers(cls):
+            if isfunction(memb) or ismethod(memb):
+                # only functions defined in the class itself are collected, inherited ones are documented with
+                # the class that defines them
+                if name in method_dict:
+                    methods_functions.append((name, memb, isinstance(method_dict[name], staticmethod)))
+            elif not callable(memb) and name[0] != "_":
+                constants.append((name, memb))
+
+        return methods_functions, constants
+
+    def _snapshot(self, target: str) -> dict:
+        """
+        Find the modules that would be collected from target right now, along with when each was last changed
+        :param target: the folder being documented in folder_mode, otherwise the single file
+        :return: a dict of file path: (modification time, size) for every module, in the order they were found
+        """
+        snapshot = {}
+        for file_path in self._find_python_files(target) if self.options.folder_mode else [target]:
             try:
-                _, file_name = path_split(file_path)
-                file_name = file_name.split('.')[0]
+                file_stat = path_stat(file_path)
+                snapshot[file_path] = (file_stat.st_mtime_ns, file_stat.st_size)
+            except OSError:  # removed while looking
+                pass
+
+        return snapshot
+
+    def _use_path(self, path: str, file_paths: list = None):
+        """
+        Point the instance at the modules to document
+        :param path: the folder to document every module in when in folder_mode, otherwise a Python or IR file
+        :param file_paths: the modules already found in the folder, looked for again when not given
+        """
+        if self.options.folder_mode:
+            self.options.directory = path
+            self._file_paths = self._find_python_files(path) if file_paths is None else file_paths
+        else:
+            self.options.directory, _ = path_split(path)
+            self._file_paths = [path]
+
+    def _write_indexes(self, dir_path: str):
+        """
+        Write out the search index, and save the indexes that an incremental export picks back up
+        :param dir_path: the export directory
+        """
+        if self._search is not None:
+            self._search.write(dir_path)
+
+        if self.options.incremental:
+            if self._symbols is not None:
+                self._symbols.save(path_join(dir_path, self.SYMBOLS_FILE))
+            if self._search is not None:
+                self._search.save(path_join(dir_path, self.SEARCH_FILE))
 
-                module_spec = importlib.util.spec_from_file_location(file_name, file_path)
-                mod = importlib.util.module_from_spec(module_spec)
-                module_spec.loader.exec_module(mod)
-                modules.append(mod)
-            except ImportError:
-                print("There was an error importing <{}>".format(file_path))
-                quit()
+    def _write_manifest(self, dir_path: str, exported: set, file_ext: str):
+        """
+        Record the source hash and exported file of every module, and remove the exported files of modules that are
+        gone or no longer produce any documentation
+        :param dir_path: the export directory
+        :param exported: a set of the file paths of the modules exported this time
+        :param file_ext: The file extension that the data is formatted for
+        """
+        old_modules = self._manifest.get('modules', {})
+        modules = {}
+        for file_path in self._file_paths:
+            if file_path in self._failed:  # left out, so it is tried again next time
+                continue
+            elif file_path in exported:
+                modules[file_path] = {'hash': self._source_hashes[file_path],
+                                      'output': self._output_name(file_path, file_ext)}
+            elif file_path in old_modules and self._is_unchanged(file_path):
+                modules[file_path] = old_modules[file_path]
+            else:  # excluded
+                modules[file_path] = {'hash': self._source_hashes[file_path], 'output': None}
+
+        # clean up stale files, making sure not to remove one that another module now exports to
+        outputs = {entry['output'] for entry in modules.values()}
+        for entry in old_modules.values():
+            if entry['output'] is not None and entry['output'] not in outputs:
+                stale_path = path_join(dir_path, entry['output'])
+                if isfile(stale_path):
+                    remove(stale_path)
+
+        manifest = {'version': __version__, 'options': self._option_fingerprint(), 'modules': modules}
+        OutputWriter.replace_if_changed(path_join(dir_path, self.MANIFEST_FILE), json.dumps(manifest))
+        self._manifest = manifest
+
+    def _write_module(self, sink: FormatterSink, mod: dict):
+        """
+        Call the proper Formatter hooks through sink to write the collected data of a whole module
+        :param sink: the FormatterSink to write through
+        :param mod: the collected data of the module
+        """
+        write = sink.write
+        write(sink.top_of_file())
+        write(sink.module_title(mod['name'], indent=0))
+        write(sink.module_start(indent=0))
+        write(sink.module_doc(mod['doc'], indent=1))
+
+        if self.options.table_of_contents:
+            write(sink.table_of_contents_start(indent=0))
+            write(sink.table_of_contents_title(prefix=mod['name'], indent=0))
+            write(sink.table_of_contents_body_start(indent=0))
+
+            for func in mod['functions']:
+                write(sink.table_of_contents_function(func['name'], prefix=mod['name'], indent=1))
+
+            for cls in mod['classes']:
+                write(sink.table_of_contents_class(cls['name'], prefix=mod['name'], indent=1))
+
+                write(sink.table_of_contents_class_start(indent=1))
+
+                for const in cls['constants']:
+                    write(sink.table_of_contents_constant(const['name'], prefix=cls['name'], indent=2))
+
+                for func in cls['static_methods']:
+                    write(sink.table_of_contents_function(func['name'], static=True, prefix=cls['name'], indent=2))
+
+                for func in cls['methods']:
+                    write(sink.table_of_contents_function(func['name'], prefix=cls['name'], indent=2))
+
+                write(sink.table_of_contents_class_end(indent=1))
+            write(sink.table_of_contents_body_end(indent=0))
+            write(sink.table_of_contents_end(indent=0))
+            sink.flush()
+
+        if mod['functions']:
+            write(sink.module_functions_title(prefix=mod['name'], indent=1))
+            self._write_functions(sink, mod['functions'], mod['name'], indent=2)
 
-        return modules
+        for cls in mod['classes']:
+            self._write_class(sink, cls, mod['name'])
+
+        write(sink.module_end(indent=0))
+        sink.flush()
+
+    def _worker_context(self, file_paths: list):
+        """
+        Get the multiprocessing context to start collection processes with. With the forkserver option, the forkserver
+        imports preload_modules, or what _find_preload_modules() finds, once, and every process is forked from it
+        already having them. The forkserver is started once and kept for the rest of the run, watch mode included.
+        :param file_paths: the paths of the modules that are going to be collected
+        :return: the context, or None for the default one
+        """
+        if not self.options.forkserver or 'forkserver' not in multiprocessing.get_all_start_methods():
+            return None
+
+        context = multiprocessing.get_context('forkserver')
+        if self._preloaded is None:
+            self._preloaded = list(self.options.preload_modules) or self._find_preload_modules(file_paths)
+            if self._preloaded:
+                print("Preloading <{}> for the collection processes".format(", ".join(self._preloaded)))
+            # this module too, so each process starts without importing anything
+            context.set_forkserver_preload([__name__] + self._preloaded)
+        return context
+
+    @classmethod
+    def build_all(cls, targets: list) -> dict:
+        """
+        Collect and export every target, one after another in this process. WorkerPools are kept for the next target
+        started the same way instead of being started again, and the caches of parsed docstrings, stylesheets and
+        compiled RenderPlans carry over too, so each target after the first mostly costs just its own modules. A
+        target that fails is reported and the rest carry on. A single target with the watch option keeps being rebuilt
+        after its export, until Ctrl+C.
+        :param targets: a list of (path, UserOptions), like PyDocumentor() takes
+        :return: a dict of index in targets: the error that stopped the target, for each one that failed
+        """
+        if len(targets) > 1 and any(options.watch for _, options in targets):
+            raise ValueError("watch only works with a single target")
+
+        pools, failed = {}, {}
+        try:
+            for i, (path, options) in enumerate(targets):
+                print("\nBuilding <{}> ({}/{})".format(path, i + 1, len(targets)))
+                try:
+                    documentor = cls(path, options, pools)
+                    documentor.export()
+                    if documentor.options.profile:
+                        print("\n" + documentor.profile_report())
+                    if documentor.options.watch:
+                        documentor.watch()
+                except (Exception, SystemExit) as error:
+                    print("<Couldn't build <{}>: {}: {}>".format(path, type(error).__name__, error))
+                    failed[i] = error
+        finally:
+            for pool in pools.values():
+                pool.close()
+
+        if failed:
+            print("\n{} of {} targets failed".format(len(failed), len(targets)))
+        return failed
 
     def display_overview(self):
         """
         Display the names of the modules collected and the classes in each        
         """
-        print("\nCollected Modules & Classes:")
+        if self.options.streaming:
+            print("\n{} modules will be collected while exporting".format(len(self._to_collect)))
+        else:
+            print("\nCollected Modules & Classes:")
 
         for mod in self._collected_data.values():
             if self._get_exclusion_level(mod) is not None:
@@ -1278,13 +4815,18 @@ class PyDocumentor:
                 else:
                     print("\t{}".format(cls['name']))
 
+        if self._unchanged_count:
+            print("({} modules unchanged since the last export)".format(self._unchanged_count))
+        if self._failed:
+            print("({} modules couldn't be collected)".format(len(self._failed)))
+
     def export(self):
         """
         Create an export directory, then create the correct Formatter and use it to call of the functions needed to
         format all of the collected data.
         """
         # create export directory
-        dir_path = self.options.output_directory + sep + self.options.output_folder_name
+        dir_path = self._export_directory()
         if not path_exists(dir_path):
             try:
                 mkdir(dir_path)
@@ -1292,99 +4834,511 @@ class PyDocumentor:
                 print("<PermissionError trying to create folder <{}>>".format(dir_path))
                 exit()
 
-        ft = None  # formatter
-        if self.options.output_format == self.HTML:
-            # self._export_as_html(dir_path)
-            ft = HtmlFormatter(self.options)
-        elif self.options.output_format == self.MARK_DOWN:
-            ft = MarkdownFormatter(self.options)
+        ft = self._create_formatter()
+        if self._profiler is not None:
+            self._profiler.instrument(ft)
+
+        with self._measure("prepare"):
+            ft.prepare(dir_path)
+            self._symbols = self._build_symbol_index(dir_path, ft.FILE_EXT) if self.options.link_symbols else None
+            self._search = self._build_search_index(dir_path) if self.options.search_index and \
+                self.options.output_format == self.HTML else None
+            saving = self._open_ir(path_join(dir_path, self.IR_FILE)) if self.options.save_collected else nullcontext()
+
+        writer = OutputWriter()
+        try:
+            with saving as ir_file:
+                if self.options.streaming:
+                    with self._measure("streaming export"):
+                        exported = self._export_streaming(dir_path, ft, ir_file, writer)
+                else:
+                    if ir_file is not None:
+                        with self._measure("save collected"):
+                            for file_path, data in self._collected_data.items():
+                                ir_file.write(self._encode_ir(file_path, data) + "\n")
+
+                    # each module is written while the next ones render
+                    with self._measure("render"):
+                        for file_path, data in self._collected_data.items():
+                            with self._measure("render", file_path):
+                                formatted = self._format_module(ft, data, file_path)
+                            writer.submit(path_join(dir_path, self._output_name(file_path, ft.FILE_EXT)), formatted,
+                                          self._measure("write", file_path))
+                            if self._search is not None:
+                                self._search.add_module(file_path, data, self._output_name(file_path, ft.FILE_EXT))
+                    exported = set(self._collected_data)
+
+            if self._symbols is not None and self._unchanged_count:
+                with self._measure("relink"):
+                    self._relink(dir_path, ft, writer, exported)
+        finally:
+            with self._measure("write"):
+                writer.close()
+        if writer.unchanged:
+            print("{} of {} files were already up to date".format(writer.unchanged, writer.written + writer.unchanged))
+
+        with self._measure("indexes"):
+            self._write_indexes(dir_path)
+            if self.options.incremental:
+                self._write_manifest(dir_path, exported, ft.FILE_EXT)
+        if self._profiler is not None:
+            self._save_profile(dir_path)
+
+        print("\nExport Successful!" if self.options.watch else "\nExport Successful!\nExiting...")
+
+    def profile_report(self, modules=10) -> str:
+        """
+        Create a readable report of where the time and memory of the build went, only available when profiling
+        :param modules: how many of the slowest modules to list
+        :return: the report
+        """
+        if self._profiler is None:
+            return "<Profiling is off>"
+        return self._profiler.report(modules)
 
-        formatted_data = {}  # file path: formatted string
-        for file_path in self._collected_data:
-            mod = self._collected_data[file_path]
+    def render_symbols(self, path: str, names: list, ft: Formatter = None) -> dict:
+        """
+        Render only the symbols asked for, without finding or collecting anything else. Just the modules the names lead
+        to are imported or parsed, depending on static_collection, and only the members asked for are collected from
+        them, so a lookup takes about as long in a huge project as in a small one. Modules are collected in this
+        process, one after the other, whatever the processes option is.
+        :param path: a Python file, or the folder the names start from
+        :param names: qualified names like package.module.Class.method, where any part can be a glob pattern like
+        Class* and naming a module or class renders everything in it. Unless a whole module is asked for, only the
+        classes and functions are rendered, without the module's page around them
+        :param ft: the Formatter to render with, defaults to the one for output_format
+        :return: a dict of file path: the rendered symbols, for every module with any of them in it
+        """
+        if not path_exists(path):
+            raise FileNotFoundError("<{}> doesn't exist".format(path))
+        found, missing = self._find_symbol_modules(path, names)
+        if missing:
+            raise LookupError("No module found for {}".format(", ".join(missing)))
+
+        ft = self._create_formatter() if ft is None else ft
+        rendered = {}
+        for file_path, wanted in found.items():
+            try:
+                data = self._collect_path(file_path, None if () in wanted else wanted)
+            except Exception as error:
+                self._collect_failed(file_path, "{}: {}".format(type(error).__name__, error))
+                continue
+            except SystemExit as error:  # the module tried to quit
+                self._collect_failed(file_path, "SystemExit: {}".format(error))
+                continue
 
-            out = []
+            if data is not None and (() in wanted or data['classes'] or data['functions']):
+                rendered[file_path] = self._format_module(ft, data, symbols_only=() not in wanted)
 
-            ft.free_run()
+        return rendered
 
-            out.append(ft.top_of_file())
-            out.append(ft.module_title(mod['name'], indent=0))
-            out.append(ft.module_start(indent=0))
-            out.append(ft.module_doc(mod['doc'], indent=1))
+    def watch(self):
+        """
+        Keep running after export(), rebuilding the modules that change. The folder, or the single file's folder, is
+        watched with inotify when it is available and polled otherwise. Changes are only acted on once saving has
+        settled down for WATCH_DEBOUNCE seconds. Stops on Ctrl+C.
+        """
+        target = self.options.directory if self.options.folder_mode else self._file_paths[0]
+        dir_path = self._export_directory()
+        ft = self._create_formatter()
+        if self._profiler is not None:
+            self._profiler.instrument(ft)
+        ft.prepare(dir_path)
+
+        if (self.options.incremental or self.options.save_collected) and not self._source_hashes:
+            self._source_hashes = {file_path: self._file_hash(file_path) for file_path in self._file_paths}
+
+        watcher = FileWatcher([self.options.directory], recursive=self.options.folder_mode,
+                              finder=self._create_finder(self.options.directory) if self.options.folder_mode else None)
+        snapshot = self._snapshot(target)
+        print("\nWatching <{}> for changes ({}), press Ctrl+C to stop".format(
+            target, "inotify" if watcher.uses_inotify else "polling"))
+
+        try:
+            while True:
+                if not watcher.wait():
+                    continue
+                watcher.settle(self.WATCH_DEBOUNCE)
+
+                current = self._snapshot(target)
+                changed = [file_path for file_path in current if snapshot.get(file_path) != current[file_path]]
+                removed = [file_path for file_path in snapshot if file_path not in current]
+                snapshot = current
+                if not changed and not removed:
+                    continue
+
+                start = perf_counter()
+                self._file_paths = list(current)
+                try:
+                    with self._measure("rebuild"):
+                        self._rebuild(dir_path, ft, changed, removed)
+                except (Exception, SystemExit) as error:  # a module that fails to load shouldn't stop the watch
+                    print("<Rebuild failed: {!r}>".format(error))
+                    continue
+                print("Rebuilt {} module(s), removed {} in {:.3f}s".format(len(changed), len(removed),
+                                                                           perf_counter() - start))
+                if self._profiler is not None:
+                    self._save_profile(dir_path)
+        except KeyboardInterrupt:
+            print("\nStopped watching")
+        finally:
+            watcher.close()
+
+
+class DocServer(ThreadingHTTPServer):
+    """
+    Serves the HTML documentation of a folder, or a single file, without exporting anything. Starting up only finds
+    the modules, each page is collected and rendered the first time it is asked for, and then kept in an LRU cache
+    of at most cache_size bytes. The source of a module is hashed whenever its page is asked for, a page whose source
+    changed is rendered again, and the hash is the page's ETag, so a browser that already has the page gets a 304
+    without anything being rendered. A page only depends on its own module, so there are no links between modules
+    or search page, which need every module collected up front.
+    """
+    daemon_threads = True
+    RESCAN_INTERVAL = 2.0  # the fewest seconds between two searches for new modules
 
-            if self.options.table_of_contents:
-                out.append(ft.table_of_contents_start(indent=0))
-                out.append(ft.table_of_contents_title(prefix=mod['name'], indent=0))
-                out.append(ft.table_of_contents_body_start(indent=0))
+    def __init__(self, path: str, options: UserOptions, address=("localhost", 8000), cache_size=64 * 1024 * 1024):
+        """
+        :param path: the folder, or Python file, to serve the documentation of
+        :param options: the UserOptions to collect and render with
+        :param address: (host, port) to listen on
+        :param cache_size: the most bytes of rendered pages to keep
+        """
+        options = options.copy(folder_mode=isdir(path), output_format=PyDocumentor.HTML, link_symbols=False,
+                               search_index=False, streaming=False, incremental=False, watch=False)
+        self.documentor = PyDocumentor(options=options, pools={})
+        self.formatter = HtmlFormatter(self.documentor.options)
+        self.path = path
+        self.cache_size = cache_size
+
+        self._pages = OrderedDict()  # page name: (etag, body), least recently used first
+        self._cached = 0  # bytes in _pages
+        self._lock = Lock()  # guards _pages
+        self._render_lock = Lock()  # one module is collected and rendered at a time
+        self._scan_lock = Lock()  # one search for new modules at a time
+        self._scanned = None  # when the modules were last searched for
+        self._modules = {}  # page name: file path
+        self._find_modules()
+
+        fingerprint = json.dumps(self.documentor._option_fingerprint(), sort_keys=True) + __version__
+        self._fingerprint = hashlib.sha1(fingerprint.encode('utf-8')).hexdigest()
+        super().__init__(address, DocRequestHandler)
+
+    def _find_modules(self):
+        """
+        Find the modules again, so ones added since the server started are served too. A search less than
+        RESCAN_INTERVAL seconds after the last one is skipped, and the folder is walked without holding the render
+        lock, so pages keep being served while a big tree is searched.
+        """
+        with self._scan_lock:
+            if self._scanned is not None and perf_counter() - self._scanned < self.RESCAN_INTERVAL:
+                return
+            folder_mode = self.documentor.options.folder_mode
+            file_paths = self.documentor._find_python_files(self.path) if folder_mode else [self.path]
+            modules = {self.documentor._output_name(file_path, HtmlFormatter.FILE_EXT): file_path
+                       for file_path in file_paths}
+            with self._render_lock:
+                self.documentor._use_path(self.path, file_paths)
+                self._modules = modules
+            self._scanned = perf_counter()
+
+    def _index_page(self) -> bytes:
+        """
+        A page linking to every module
+        :return: the page
+        """
+        self._find_modules()
+        base = self.path if self.documentor.options.folder_mode else path_split(self.path)[0]
+        links = sorted((relpath(file_path, base), name) for name, file_path in self._modules.items())
+        items = "".join("<a href='{}'>{}</a><br>\n".format(escape(name), escape(rel_path)) for rel_path, name in links)
+        return "<head><title>{}</title></head>\n<div class='module'>\n{}</div>".format(
+            escape(self.path), items).encode('utf-8')
+
+    def _render(self, file_path: str) -> tuple:
+        """
+        Collect and render a single module
+        :param file_path: the path of the module
+        :return: (status, page or the reason there isn't one)
+        """
+        documentor = self.documentor
+        with self._render_lock:
+            _, data = next(documentor._iter_collected([file_path]))
+            if data is None:
+                if file_path in documentor._failed:
+                    return 500, "Couldn't collect {}: {}".format(file_path, documentor._failed[file_path])
+                return 404, "{} is excluded from the documentation".format(file_path)
+            return 200, documentor._format_module(self.formatter, data)
+
+    def _store(self, name: str, etag: str, body: bytes):
+        """
+        Cache a page, dropping the least recently used ones until the cache fits in cache_size again
+        """
+        with self._lock:
+            old = self._pages.pop(name, None)
+            if old is not None:
+                self._cached -= len(old[1])
+            if len(body) <= self.cache_size:
+                self._pages[name] = (etag, body)
+                self._cached += len(body)
+            while self._cached > self.cache_size:
+                _, (_, dropped) = self._pages.popitem(last=False)
+                self._cached -= len(dropped)
+
+    def page(self, url_path: str, if_none_match=None) -> tuple:
+        """
+        Get the response to a request
+        :param url_path: the path of the requested URL
+        :param if_none_match: the If-None-Match header of the request, if there is one
+        :return: (status, headers, body)
+        """
+        name = url_path.lstrip("/")
+        html = {'Content-Type': "text/html; charset=utf-8"}
+        if not name:
+            return 200, dict(html, **{'Cache-Control': "no-cache"}), self._index_page()
+        if name == self.formatter.css_name:  # the name changes with the contents
+            return 200, {'Content-Type': "text/css; charset=utf-8", 'Cache-Control': "max-age=31536000, immutable"}, \
+                self.formatter.css.encode('utf-8')
+
+        if name not in self._modules and name.endswith(HtmlFormatter.FILE_EXT):
+            self._find_modules()
+        file_path = self._modules.get(name)
+        try:
+            source_hash = PyDocumentor._file_hash(file_path) if file_path is not None else None
+        except OSError:  # removed since the modules were found
+            source_hash = None
+        if source_hash is None:
+            return 404, html, "<p>No module is documented as {}</p>".format(escape(name)).encode('utf-8')
+
+        etag = '"{}"'.format(hashlib.sha1((source_hash + self._fingerprint).encode('utf-8')).hexdigest()[:20])
+        headers = dict(html, **{'ETag': etag, 'Cache-Control': "no-cache"})
+        if if_none_match is not None:
+            # weak comparison, as any W/ prefix only says the client's copy may differ in ways that don't matter
+            tags = {tag[2:] if tag.startswith("W/") else tag for tag in map(str.strip, if_none_match.split(","))}
+            if etag in tags or "*" in tags:
+                return 304, headers, b""
+
+        with self._lock:
+            cached = self._pages.get(name)
+            if cached is not None and cached[0] == etag:
+                self._pages.move_to_end(name)
+                return 200, headers, cached[1]
+
+        status, text = self._render(file_path)
+        if status != 200:
+            return status, html, "<p>{}</p>".format(escape(text)).encode('utf-8')
+        body = text.encode('utf-8')
+        self._store(name, etag, body)
+        return 200, headers, body
+
+    def server_close(self):
+        super().server_close()
+        for pool in self.documentor._pools.values():
+            pool.close()
+
+
+class DocRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answers the GET and HEAD requests of a DocServer
+    """
+    server_version = "PyDocumentor/" + __version__
 
-                for func in mod['functions']:
-                        out.append(ft.table_of_contents_function(func['name'], prefix=mod['name'], indent=1))
+    def _respond(self, send_body: bool):
+        status, headers, body = self.server.page(unquote(urlsplit(self.path).path), self.headers.get("If-None-Match"))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body and status != 304:
+            self.wfile.write(body)
 
-                for cls in mod['classes']:
-                    out.append(ft.table_of_contents_class(cls['name'], prefix=mod['name'], indent=1))
+    def do_GET(self):
+        self._respond(True)
 
-                    out.append(ft.table_of_contents_class_start(indent=1))
+    def do_HEAD(self):
+        self._respond(False)
 
-                    for const in cls['constants']:
-                        out.append(ft.table_of_contents_constant(const['name'], prefix=cls['name'],
-                                                                 indent=2))
 
-                    for func in cls['static_methods']:
-                        out.append(ft.table_of_contents_function(func['name'], static=True,
-                                                                 prefix=cls['name'], indent=2))
+FORMAT_NAMES = {'html': PyDocumentor.HTML, 'markdown': PyDocumentor.MARK_DOWN, 'md': PyDocumentor.MARK_DOWN}
 
-                    for func in cls['methods']:
-                        out.append(ft.table_of_contents_function(func['name'], prefix=cls['name'],
-                                                                 indent=2))
 
-                    out.append(ft.table_of_contents_class_end(indent=1))
-                out.append(ft.table_of_contents_body_end(indent=0))
-                out.append(ft.table_of_contents_end(indent=0))
+def option_values(values: dict, base_dir="") -> dict:
+    """
+    Turn options read from the command line or a config file into UserOptions values. output_format can be given by
+    name, and a relative output_directory is taken from base_dir.
+    :param values: option name: value
+    :param base_dir: the folder relative paths are relative to
+    :return: the options, ready for UserOptions()
+    """
+    values = dict(values)
+    if isinstance(values.get('output_format'), str):
+        if values['output_format'].lower() not in FORMAT_NAMES:
+            raise ValueError("<{}> is not a format, use one of {}".format(values['output_format'],
+                                                                        ", ".join(FORMAT_NAMES)))
+        values['output_format'] = FORMAT_NAMES[values['output_format'].lower()]
+    if values.get('output_directory'):
+        values['output_directory'] = path_join(base_dir, values['output_directory'])
+    return values
+
+
+def load_config(config_path: str, overrides: dict) -> list:
+    """
+    Read the build targets out of a JSON config file. It holds the "options" every target shares, and the list of
+    "targets", each either a path, or an object with a "path" and any options of its own. Option names are the names
+    of the UserOptions attributes, and relative paths are relative to the config file.
 
-            if mod['functions']:
-                out.append(ft.module_functions_title(prefix=mod['name'], indent=1))
-                self._format_functions(out, ft, mod['functions'], mod['name'], indent=2)
+        {"options": {"output_directory": "docs", "output_format": "markdown"},
+         "targets": ["repo1/src", {"path": "repo2/lib", "output_folder_name": "lib", "table_of_contents": false}]}
 
-            for cls in mod['classes']:
-                out.append(ft.class_start(indent=1))
-                out.append(ft.class_title(cls['name'], prefix=mod['name'], indent=1))
-                out.append(ft.class_body_start(indent=1))
-                out.append(ft.class_doc(cls['doc'], indent=2))
+    :param config_path: the path of the config file
+    :param overrides: options from the command line, which win over the shared options but not a target's own
+    :return: a list of (path, UserOptions), ready for PyDocumentor.build_all()
+    """
+    with open(config_path, 'r', encoding='utf-8') as file:
+        config = json.load(file)
 
-                if cls['constants']:
-                    out.append(ft.class_constants_title(indent=2))
-                    out.append(ft.class_constants_start(indent=2))
-                    for const in cls['constants']:
-                        out.append(ft.class_constant(const['name'], const['value'], prefix=cls['name'],
-                                                     indent=3))
-                    out.append(ft.class_constants_end(indent=2))
+    base_dir, _ = path_split(config_path)
+    shared = dict(option_values(config.get('options', {}), base_dir), **overrides)
+    targets = []
+    for target in config.get('targets', []):
+        own = {'path': target} if isinstance(target, str) else dict(target)
+        path = path_join(base_dir, own.pop('path'))
+        targets.append((path, target_options(path, dict(shared, **option_values(own, base_dir)))))
 
-                if cls['static_methods']:
-                    out.append(ft.static_function_title(indent=2))
-                    self._format_functions(out, ft, cls['static_methods'], cls['name'], indent=3)
+    if len(targets) > 1 and any(options.watch for _, options in targets):
+        raise ValueError("<{}>: watch only works with a single target".format(config_path))
+    return targets
 
-                if cls['methods']:
-                    out.append(ft.methods_title(indent=2))
-                    self._format_functions(out, ft, cls['methods'], cls['name'], indent=3)
 
-                out.append(ft.class_body_end(indent=1))
-                out.append(ft.class_end(indent=1))
+def target_options(path: str, values: dict) -> UserOptions:
+    """
+    Create the UserOptions of a single target. Targets that don't name their export folder are exported to a folder
+    named after the file or folder they document, so targets sharing an output directory don't overwrite each other.
+    :param path: the path of the target
+    :param values: option name: value
+    :return: the options
+    """
+    values.setdefault('output_folder_name', path_split(path.rstrip("/\\"))[1].split(".")[0])
+    return UserOptions(**values)
 
-            out.append(ft.module_end(indent=0))
 
-            # clean empty str
-            cleaned = []
-            for i in out:
-                if i:
-                    cleaned.append(i)
+def main(argv=None):
+    """
+    Run from the command line. Without any arguments, everything is asked for in the console. Otherwise nothing is:
+    the paths given and the targets in --config are all built, one after another, in this one process. With --serve,
+    a DocServer serves the documentation of a single path instead, and with --symbol, just the symbols asked for in a
+    single path are rendered and printed.
 
-            formatted_data[file_path] = "\n".join(cleaned)
+        python py_documentor.py src/ lib/ -o docs --format markdown --no-toc
+        python py_documentor.py --config docs.json --processes 4
+        python py_documentor.py src/ --serve 8000
+        python py_documentor.py src/ --symbol pkg.module.SomeClass --symbol "pkg.*.load_*" -f markdown
 
-        self._file_writer(dir_path, formatted_data, ft.FILE_EXT)
+    :param argv: the arguments, defaults to sys.argv[1:]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        documentor = PyDocumentor()
+        documentor.display_overview()
+        documentor.export()
+        if documentor.options.profile:
+            print("\n" + documentor.profile_report())
+        if documentor.options.watch:
+            documentor.watch()
+        return
+
+    parser = ArgumentParser(description="Create HTML or Markdown documentation for Python modules. Run without any "
+                                        "arguments to be asked for every option instead.")
+    parser.add_argument("paths", nargs="*", help="Python files, folders of them, or {} files".format(
+        PyDocumentor.IR_EXT))
+    parser.add_argument("-c", "--config", metavar="FILE", help="JSON file of targets to build, see load_config()")
+    parser.add_argument("-o", "--output", dest="output_directory", metavar="DIR",
+                        help="directory to export into, defaults to where the modules are")
+    parser.add_argument("-n", "--name", dest="output_folder_name", metavar="NAME",
+                        help="export folder name, defaults to the name of each path")
+    parser.add_argument("-f", "--format", dest="output_format", choices=sorted(FORMAT_NAMES), help="defaults to html")
+    parser.add_argument("--no-toc", dest="table_of_contents", action="store_const", const=False,
+                        help="leave out the table of contents")
+    parser.add_argument("--private", dest="collect_private_methods", action="store_const", const=True,
+                        help="collect methods prefixed with '_'")
+    parser.add_argument("--css", choices=("each", "shared"),
+                        help="add the CSS to each file, or write one stylesheet they share")
+    parser.add_argument("--minify-css", dest="minify_css", action="store_const", const=True,
+                        help="strip comments and whitespace from the CSS")
+    parser.add_argument("--static", dest="static_collection", action="store_const", const=True,
+                        help="collect from the source without importing modules")
+    parser.add_argument("-j", "--processes", type=int, metavar="N",
+                        help="processes to collect with, 0 to use every core")
+    parser.add_argument("--incremental", action="store_const", const=True,
+                        help="only rebuild modules that changed since the last export")
+    parser.add_argument("--set", action="append", default=[], metavar="OPTION=VALUE",
+                        help="set any UserOptions attribute, VALUE is read as JSON if it can be")
+    parser.add_argument("--serve", metavar="[HOST:]PORT",
+                        help="serve the HTML docs of a single path, rendering each page when it is first asked for")
+    parser.add_argument("--cache-mb", type=float, default=64, metavar="MB",
+                        help="rendered pages --serve keeps, defaults to 64 MB")
+    parser.add_argument("-s", "--symbol", action="append", default=[], metavar="NAME",
+                        help="print just this symbol of a single path, like pkg.module.Class, parts can be globs")
+    args = parser.parse_args(argv)
+    if not args.paths and not args.config:
+        parser.error("give at least one path or a --config")
+    if args.serve is not None and (len(args.paths) != 1 or args.config):
+        parser.error("--serve takes a single path and no --config")
+    if args.symbol and (len(args.paths) != 1 or args.config or args.serve is not None):
+        parser.error("--symbol takes a single path and no --config or --serve")
+
+    overrides = {name: getattr(args, name) for name in (
+        'output_directory', 'output_folder_name', 'output_format', 'table_of_contents', 'collect_private_methods',
+        'minify_css', 'static_collection', 'processes', 'incremental') if getattr(args, name) is not None}
+    if args.css is not None:
+        overrides['add_css_to_each_file'] = args.css == "each"
+    for setting in args.set:
+        name, _, value = setting.partition("=")
+        try:
+            overrides[name.strip()] = json.loads(value)
+        except ValueError:
+            overrides[name.strip()] = value
+
+    if args.serve is not None:
+        host, _, port = args.serve.rpartition(":")
+        try:
+            server = DocServer(args.paths[0], UserOptions(**option_values(overrides)), (host or "localhost", int(port)),
+                               int(args.cache_mb * 1024 * 1024))
+        except (OSError, ValueError, TypeError) as error:
+            parser.error(str(error))
+        print("Serving <{}> at http://{}:{}/".format(args.paths[0], *server.server_address[:2]))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    if args.symbol:
+        try:
+            documentor = PyDocumentor(options=UserOptions(**option_values(overrides)))
+            rendered = documentor.render_symbols(args.paths[0], args.symbol)
+        except (OSError, ValueError, TypeError, LookupError) as error:
+            parser.error(str(error))
+        if not rendered:
+            print("<Nothing matches {}>".format(", ".join(args.symbol)))
+            sys.exit(1)
+        print("\n".join(rendered.values()))
+        return
+
+    try:
+        overrides = option_values(overrides)
+        targets = load_config(args.config, overrides) if args.config else []
+        targets += [(path, target_options(path, dict(overrides))) for path in args.paths]
+    except (OSError, ValueError, TypeError, KeyError) as error:
+        parser.error("a target has no path" if isinstance(error, KeyError) else str(error))
+    if len(targets) > 1 and any(options.watch for _, options in targets):
+        parser.error("watch only works with a single target")
+
+    sys.exit(1 if PyDocumentor.build_all(targets) else 0)
 
-        print("\nExport Successful!\nExiting...")
 
 if __name__ == "__main__":
-    docker = PyDocumentor()
-    docker.display_overview()
-    docker.export()
+    main()